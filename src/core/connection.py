@@ -1,6 +1,7 @@
 from typing import Union
 
 from core.geometry import centroid, add_doors_to_polygon
+from core.grid_index import GridIndex
 from core.osm_helper import write_python_way
 
 
@@ -26,7 +27,8 @@ class Connection:
 
     Methods
     -------
-    find_ways(all_doors: dict[str, list[tuple[float, float]]]) : list[dict[str, Union[list[tuple[float, float]], str]]]
+    find_ways(all_doors: dict[str, list[tuple[float, float]]], door_index: dict[str, GridIndex]) \
+            : list[dict[str, Union[list[tuple[float, float]], str]]]
         Calculates the ways for navigation inside the room.
     """
 
@@ -35,10 +37,11 @@ class Connection:
         self.type = con_type
         self.ways = []
 
-    def find_ways(self, all_doors: dict[str, list[tuple[float, float]]]) \
+    def find_ways(self, all_doors: dict[str, list[tuple[float, float]]], door_index: dict[str, GridIndex] = None) \
             -> list[dict[str, Union[list[tuple[float, float]], str]]]:
         """
         Calculates the ways for navigation inside the room.
+        If a door index per level is given, only the doors near the connectors' edges are checked.
         """
         centres = []
         for connector in self.members:
@@ -48,7 +51,8 @@ class Connection:
             centres.append({'level': level, 'centre': centre})
 
             if level in all_doors:  # check if there are any doors on the same level
-                doors = add_doors_to_polygon(connector['connector'], all_doors[level])
+                level_index = door_index.get(level) if door_index is not None else None
+                doors = add_doors_to_polygon(connector['connector'], all_doors[level], level_index)
                 for door in doors:
                     self.ways.append(write_python_way([centre, door], level, self.type))
 
@@ -2,6 +2,7 @@ import math
 from typing import Union
 
 import core.tolerances as tolerances
+from core.grid_index import GridIndex
 
 
 def centroid(points: list[tuple[float, float]]) -> tuple[float, float]:
@@ -12,6 +13,14 @@ def centroid(points: list[tuple[float, float]]) -> tuple[float, float]:
     return sum(x) / len(x), sum(y) / len(y)
 
 
+def bounding_box(points: list[tuple[float, float]], margin: float = 0.) -> tuple[float, float, float, float]:
+    """
+    Finds the bounding box (min_x, min_y, max_x, max_y) of a polygon, enlarged by a margin on every side.
+    """
+    x, y = zip(*points)
+    return min(x) - margin, min(y) - margin, max(x) + margin, max(y) + margin
+
+
 def in_interval(point1: tuple[float, float], point2: tuple[float, float], point3: tuple[float, float]) -> bool:
     """
     Checks whether point3 is between point_a and point_b.
@@ -117,6 +126,39 @@ def anti_clockwise(polygon: list[tuple[float, float]]) -> bool:
     return result < 0
 
 
+def area(polygon: list[tuple[float, float]]) -> float:
+    """
+    Calculates the area of a polygon (list of points) regardless of its order.
+    """
+    result = 0
+    x, y = zip(*polygon)
+    length = len(polygon)
+    index = length - 1
+    index_next = 0
+    while index_next < length:
+        result += (y[index] + y[index_next]) * (x[index] - x[index_next])
+        index = index_next
+        index_next += 1
+    return abs(result) / 2
+
+
+def reflex_vertices(polygon: list[tuple[float, float]]) -> int:
+    """
+    Counts the vertices of a polygon (list of points) whose interior angle is larger than 180 degrees.
+    """
+    orientation = 1 if anti_clockwise(polygon) else -1
+    count = 0
+    for index in range(len(polygon)):
+        point_prev = polygon[index - 1]
+        point = polygon[index]
+        point_next = polygon[(index + 1) % len(polygon)]
+        cross = (point[0] - point_prev[0]) * (point_next[1] - point[1]) \
+            - (point[1] - point_prev[1]) * (point_next[0] - point[0])
+        if cross * orientation > 0:
+            count += 1
+    return count
+
+
 def point_inside_polygon(point: tuple[float, float], polygon: list[tuple[float, float]],
                          tolerance: float = tolerances.general_mapping_uncertainty) -> bool:
     """
@@ -202,18 +244,29 @@ def polygon_intersection(way: list[tuple[float, float]], polygon: list[tuple[flo
     Checks whether a specific way crosses a part of a polygon.
     """
     for i in range(len(way) - 1):
-        m_way_segment, n_way_segment = get_line(way[i], way[i + 1], )
         for polygon_point1, polygon_point2 in zip(polygon, polygon[1:] + polygon[:1]):
-            if polygon_point1 != polygon_point2:
-                m_polygon_segment, n_polygon_segment = get_line(polygon_point1, polygon_point2)
-                intersection_point = intersection(m_polygon_segment, m_way_segment, n_polygon_segment, n_way_segment)
+            if way_crosses_edge((way[i], way[i + 1]), (polygon_point1, polygon_point2)):
+                return True
+    return False
 
-                if intersection_point:
-                    if in_interval(polygon_point1, polygon_point2, intersection_point) and \
-                            in_interval(way[i], way[i + 1], intersection_point):
-                        if not almost_same_point(intersection_point, way[i]) and \
-                                not almost_same_point(intersection_point, way[i + 1]):
-                            return True
+
+def way_crosses_edge(way_segment: tuple[tuple[float, float], tuple[float, float]],
+                     edge: tuple[tuple[float, float], tuple[float, float]]) -> bool:
+    """
+    Checks whether a way segment crosses a polygon edge somewhere else than at the ends of the way segment.
+    """
+    if edge[0] == edge[1]:
+        return False
+    m_way_segment, n_way_segment = get_line(way_segment[0], way_segment[1])
+    m_polygon_segment, n_polygon_segment = get_line(edge[0], edge[1])
+    intersection_point = intersection(m_polygon_segment, m_way_segment, n_polygon_segment, n_way_segment)
+
+    if intersection_point:
+        if in_interval(edge[0], edge[1], intersection_point) and \
+                in_interval(way_segment[0], way_segment[1], intersection_point):
+            if not almost_same_point(intersection_point, way_segment[0]) and \
+                    not almost_same_point(intersection_point, way_segment[1]):
+                return True
     return False
 
 
@@ -276,45 +329,70 @@ def get_orthogonal_line(m: Union[float, None], point: tuple[float, float]) -> Un
     return m2, n2
 
 
-def add_doors_to_polygon(polygon: list[tuple[float, float]], all_doors: list[tuple[float, float]]) \
-        -> list[tuple[float, float]]:
+def add_doors_to_polygon(polygon: list[tuple[float, float]], all_doors: list[tuple[float, float]],
+                         door_index: GridIndex = None) -> list[tuple[float, float]]:
     """
     Inserts the door points into the polygon.
+
+    The edges are walked once; every edge only tests the doors the door_index finds near it (all doors without index).
     """
     doors = []
+    found = set()
+    vertices = set(polygon)
+    # doors on vertices are found while the first edge is checked
+    vertex_doors = set()
+    if door_index is not None:
+        for vertex in polygon:
+            vertex_doors.update(i for i in door_index.query(vertex + vertex) if all_doors[i] in vertices)
     index = 0
     index_prev = len(polygon) - 1
-    change = True
-    while change:
-        change = False
-        while index < len(polygon):
-            added_door = False
-            m, b = get_line(polygon[index_prev], polygon[index])
-            for door in all_doors:
-                if door not in doors:
-                    if door in polygon:
+    while index < len(polygon):
+        added_door = False
+        m, b = get_line(polygon[index_prev], polygon[index])
+        if door_index is None:
+            candidates = all_doors
+        else:
+            box = bounding_box([polygon[index_prev], polygon[index]], margin=2 * tolerances.door_to_room)
+            candidates = [all_doors[i] for i in sorted(vertex_doors.union(door_index.query(box)))]
+            vertex_doors = set()
+        for door in candidates:
+            if door not in found:
+                if door in vertices:
+                    doors.append(door)
+                    found.add(door)
+                else:
+                    m2, b2 = get_orthogonal_line(m, door)
+                    intersection_point = intersection(m, m2, b, b2)
+                    point_distance = distance(intersection_point, door)
+                    # the door has to be close to the line of the edge and its foot point on the edge or at a vertex
+                    if point_distance < tolerances.door_to_room and \
+                            (in_interval(polygon[index_prev], polygon[index], intersection_point)
+                             or almost_same_point(intersection_point, polygon[index])
+                             or almost_same_point(intersection_point, polygon[index_prev])):
+                        polygon.insert(index, door)
+                        vertices.add(door)
                         doors.append(door)
-                    else:
-                        m2, b2 = get_orthogonal_line(m, door)
-                        intersection_point = intersection(m, m2, b, b2)
-                        point_distance = distance(intersection_point, door)
-                        if (point_distance < tolerances.door_to_room and
-                            in_interval(polygon[index_prev], polygon[index], intersection_point)) \
-                                or almost_same_point(intersection_point, polygon[index] or
-                                                     almost_same_point(intersection_point, polygon[index_prev])):
-                            polygon.insert(index, door)
-                            doors.append(door)
-                            change = True
-                            added_door = True
-                            if index == 0:
-                                index_prev += 1
-            if not added_door:
-                index_prev = index
-                index += 1
+                        found.add(door)
+                        added_door = True
+                        if index == 0:
+                            index_prev += 1
+        if not added_door:
+            index_prev = index
+            index += 1
 
     return doors
 
 
+def door_grid(all_doors: list[tuple[float, float]]) -> GridIndex:
+    """
+    Registers doors (points) in a grid whose cells are as large as the distance of a door to its room edge.
+    """
+    door_index = GridIndex(tolerances.door_to_room or 1.)
+    for i, door in enumerate(all_doors):
+        door_index.insert(i, door + door)
+    return door_index
+
+
 def way_is_valid(point1: tuple[float, float], point2: tuple[float, float], polygon: list[tuple[float, float]],
                  doors: list[tuple[float, float]], barriers: list[list[tuple[float, float]]]) -> bool:
     """
@@ -357,13 +435,23 @@ def way_intersects_with_way(way: list[tuple[float, float]],
     """
     Checks whether a specific way crosses another way.
     """
-    m, n = get_line(way[0], way[1])
     for way2 in ways:
         for i in range(len(way2['way']) - 1):
-            m2, n2 = get_line(way2['way'][i], way2['way'][i + 1])
-            intersection_point = intersection(m, m2, n, n2)
-            if intersection_point:
-                if in_interval(way[0], way[1], intersection_point) \
-                        and in_interval(way2['way'][i], way2['way'][i + 1], intersection_point):
-                    return True
+            if segments_intersect((way[0], way[1]), (way2['way'][i], way2['way'][i + 1])):
+                return True
+    return False
+
+
+def segments_intersect(segment1: tuple[tuple[float, float], tuple[float, float]],
+                       segment2: tuple[tuple[float, float], tuple[float, float]]) -> bool:
+    """
+    Checks whether two segments cross each other anywhere but at their end points.
+    """
+    m, n = get_line(segment1[0], segment1[1])
+    m2, n2 = get_line(segment2[0], segment2[1])
+    intersection_point = intersection(m, m2, n, n2)
+    if intersection_point:
+        if in_interval(segment1[0], segment1[1], intersection_point) \
+                and in_interval(segment2[0], segment2[1], intersection_point):
+            return True
     return False
@@ -0,0 +1,88 @@
+import math
+
+
+class GridIndex:
+    """
+    A uniform grid that finds items by their bounding boxes without comparing them with all other items.
+
+    Every item is registered in all grid cells its bounding box overlaps. A query collects the items of the cells that
+    the query box overlaps and keeps those whose bounding boxes really overlap it.
+
+    Args
+    ----
+    cell_size : float
+        The width and height of a grid cell.
+
+    Methods
+    -------
+    insert(item: int, box: tuple[float, float, float, float])
+        Registers an item (e.g. its index in a list) with its bounding box.
+    remove(item: int)
+        Unregisters an item, e.g. after it was assigned and must not be found again.
+    query(box: tuple[float, float, float, float]) : list[int]
+        Returns all items whose bounding boxes overlap the given box in the order of their values.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size: float = cell_size
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._boxes: dict[int, tuple[float, float, float, float]] = {}
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, item: int):
+        return item in self._boxes
+
+    def insert(self, item: int, box: tuple[float, float, float, float]):
+        """
+        Registers an item (e.g. its index in a list) with its bounding box given as (min_x, min_y, max_x, max_y).
+        """
+        self._boxes[item] = box
+        min_i, min_j, max_i, max_j = self._cell_range(box)
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                self._cells.setdefault((i, j), set()).add(item)
+
+    def remove(self, item: int):
+        """
+        Unregisters an item, e.g. after it was assigned and must not be found again.
+        """
+        min_i, min_j, max_i, max_j = self._cell_range(self._boxes.pop(item))
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                cell = self._cells[(i, j)]
+                cell.discard(item)
+                if not cell:
+                    del self._cells[(i, j)]
+
+    def query(self, box: tuple[float, float, float, float]) -> list[int]:
+        """
+        Returns all items whose bounding boxes overlap the given box in the order of their values.
+        """
+        min_i, min_j, max_i, max_j = self._cell_range(box)
+        candidates = set()
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._cells):
+            # the box covers more cells than are occupied
+            for (i, j), items in self._cells.items():
+                if min_i <= i <= max_i and min_j <= j <= max_j:
+                    candidates.update(items)
+        else:
+            for i in range(min_i, max_i + 1):
+                for j in range(min_j, max_j + 1):
+                    candidates.update(self._cells.get((i, j), ()))
+        return sorted(item for item in candidates if boxes_overlap(self._boxes[item], box))
+
+    def _cell_range(self, box: tuple[float, float, float, float]) -> tuple[int, int, int, int]:
+        """
+        A helper method that returns the indices of the first and the last grid cells a bounding box overlaps.
+        """
+        return (math.floor(box[0] / self.cell_size), math.floor(box[1] / self.cell_size),
+                math.floor(box[2] / self.cell_size), math.floor(box[3] / self.cell_size))
+
+
+def boxes_overlap(box1: tuple[float, float, float, float], box2: tuple[float, float, float, float]) -> bool:
+    """
+    Checks whether two bounding boxes overlap or touch.
+    """
+    return box1[0] <= box2[2] and box2[0] <= box1[2] and box1[1] <= box2[3] and box2[1] <= box1[3]
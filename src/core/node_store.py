@@ -0,0 +1,121 @@
+from array import array
+from typing import Iterable
+
+
+class NodeStore:
+    """
+    A compact store for the coordinates of osm nodes.
+
+    Ids, latitudes and longitudes are kept in contiguous arrays; the position of a node in these arrays is its index.
+    Polygons and ways can therefore be stored as index arrays instead of lists of coordinate tuples.
+
+    Attributes
+    ----------
+    ids : array[int]
+        The osm ids of all stored nodes.
+    lat : array[float]
+        The latitudes of all stored nodes.
+    lon : array[float]
+        The longitudes of all stored nodes.
+
+    Methods
+    -------
+    add(node_id: str, lat: float, lon: float) : int
+        Stores the coordinates of a node and returns its index.
+    index(node_id: str) : int
+        Returns the index of a known node.
+    reserve(node_id: str) : int
+        Returns the index of a node and reserves one if the node is not known yet.
+    indices(node_ids: Iterable[str], reserve: bool) : array[int]
+        Returns the indices of several nodes as an index array.
+    coordinates(index: int) : tuple[float, float]
+        Returns the coordinates of the node with the given index.
+    polygon(indices: Iterable[int]) : list[tuple[float, float]]
+        Returns the coordinates of the nodes with the given indices.
+    set_coordinates(index: int, lat: float, lon: float)
+        Overwrites the coordinates of the node with the given index.
+    """
+
+    def __init__(self):
+        self.ids: array = array('q')
+        self.lat: array = array('d')
+        self.lon: array = array('d')
+        self._index: dict[int, int] = {}
+        self._reserved: set[int] = set()  # the indices of referenced nodes whose coordinates are not added yet
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id: str):
+        return int(node_id) in self._index
+
+    def add(self, node_id: str, lat: float, lon: float) -> int:
+        """
+        Stores the coordinates of a node and returns its index.
+        """
+        index = self.reserve(node_id)
+        self._reserved.discard(index)
+        self.set_coordinates(index, lat, lon)
+        return index
+
+    def index(self, node_id: str) -> int:
+        """
+        Returns the index of a known node; an unknown node id raises a KeyError.
+        """
+        return self._index[int(node_id)]
+
+    def reserve(self, node_id: str) -> int:
+        """
+        Returns the index of a node and reserves one if the node is not known yet, e.g. for a way that references a
+        node before it is read. Reading the coordinates of a reserved node raises a KeyError until it is added.
+        """
+        key = int(node_id)
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.ids)
+            self._index[key] = index
+            self._reserved.add(index)
+            self.ids.append(key)
+            self.lat.append(float('nan'))
+            self.lon.append(float('nan'))
+        return index
+
+    def indices(self, node_ids: Iterable[str], reserve: bool = False) -> array:
+        """
+        Returns the indices of several nodes as an index array; unknown nodes are only reserved if reserve is set.
+        """
+        lookup = self.reserve if reserve else self.index
+        return array('l', [lookup(node_id) for node_id in node_ids])
+
+    def coordinates(self, index: int) -> tuple[float, float]:
+        """
+        Returns the coordinates of the node with the given index.
+        """
+        self._check_added([index])
+        return self.lat[index], self.lon[index]
+
+    def polygon(self, indices: Iterable[int]) -> list[tuple[float, float]]:
+        """
+        Returns the coordinates of the nodes with the given indices.
+        """
+        if self._reserved:
+            indices = list(indices)
+            self._check_added(indices)
+        lat = self.lat
+        lon = self.lon
+        return [(lat[index], lon[index]) for index in indices]
+
+    def set_coordinates(self, index: int, lat: float, lon: float):
+        """
+        Overwrites the coordinates of the node with the given index.
+        """
+        self.lat[index] = lat
+        self.lon[index] = lon
+
+    def _check_added(self, indices: Iterable[int]):
+        """
+        A helper method that raises a KeyError for the first of the given nodes that is only reserved.
+        """
+        for index in indices:
+            if index in self._reserved:
+                raise KeyError(f"node {self.ids[index]} is referenced but not defined")
@@ -1,7 +1,5 @@
 from typing import Union
 
-from bs4 import BeautifulSoup
-
 
 def write_python_way(nodes: list[tuple[float, float]], level: str, way_type='footway') \
         -> dict[str, Union[list[tuple[float, float]], str]]:
@@ -14,7 +12,11 @@ def write_python_way(nodes: list[tuple[float, float]], level: str, way_type='foo
 def beautify_xml(file_name: str):
     """
     Takes the generated file_name and inserts newlines as well as indentation.
+
+    Only needed for files that were not written by the OsmWriter, therefore BeautifulSoup is imported on demand.
     """
+    from bs4 import BeautifulSoup
+
     # open xml file_name and parse it with BeautifulSoup
     with open(file_name, 'r') as file:
         soup: str = BeautifulSoup(file, "lxml-xml").prettify()
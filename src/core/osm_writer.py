@@ -0,0 +1,203 @@
+import xml.etree.ElementTree as ET
+from typing import Iterable
+
+
+class OsmWriter:
+    """
+    A streaming writer that emits osm records directly into a file without building an ElementTree first.
+
+    The records are collected in small chunks that are written as soon as a chunk is full.
+    Without beautification the layout equals the one of ElementTree.write, with beautification every element is put on
+    its own line, indented by two spaces per level and its attributes are sorted by name.
+
+    Args
+    ----
+    file_name : str
+        The name (with absolute or relative path) of the file that shall be written.
+    beautify : bool
+        Whether newlines and indentation shall be inserted.
+    chunk_size : int
+        The number of records that are collected before they are written to the file.
+
+    Methods
+    -------
+    start(attributes: dict[str, str])
+        Writes the xml declaration and opens the osm root element.
+    write_element(tag: str, attributes: dict[str, str], children: Iterable[tuple[str, dict[str, str]]])
+        Writes an element with optional children that have no children themselves, like nodes and ways.
+    write_tree(element: ET.Element)
+        Writes an existing xml element with all its children, text and tail.
+    close()
+        Closes the osm root element and the file.
+    """
+
+    def __init__(self, file_name: str, beautify: bool = True, chunk_size: int = 4096):
+        self.beautify: bool = beautify
+        self._file = open(file_name, 'w', encoding='utf-8')
+        self._chunk: list[str] = []
+        self._chunk_size: int = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self, attributes: dict[str, str]):
+        """
+        Writes the xml declaration and opens the osm root element.
+        """
+        if self.beautify:
+            self._chunk.append('<?xml version="1.0" encoding="utf-8"?>\n<osm' + self._attributes(attributes) + '>\n')
+        else:
+            self._chunk.append("<?xml version='1.0' encoding='utf-8'?>\n<osm" + self._attributes(attributes) + '>')
+
+    def write_element(self, tag: str, attributes: dict[str, str],
+                      children: Iterable[tuple[str, dict[str, str]]] = ()):
+        """
+        Writes an element with optional children that have no children themselves, like nodes and ways.
+        """
+        if self.beautify:
+            parts = [_INDENT + '<' + tag + self._attributes(attributes)]
+            for child_tag, child_attributes in children:
+                parts.append(_INDENT * 2 + '<' + child_tag + self._attributes(child_attributes) + '/>\n')
+            if len(parts) == 1:
+                parts[0] += '/>\n'
+            else:
+                parts[0] += '>\n'
+                parts.append(_INDENT + '</' + tag + '>\n')
+            self._chunk.append(''.join(parts))
+        else:
+            parts = ['<' + tag + self._attributes(attributes)]
+            for child_tag, child_attributes in children:
+                parts.append('<' + child_tag + self._attributes(child_attributes) + ' />')
+            if len(parts) == 1:
+                parts[0] += ' />'
+            else:
+                parts[0] += '>'
+                parts.append('</' + tag + '>')
+            self._chunk.append(''.join(parts))
+        self._flush_if_full()
+
+    def write_tree(self, element: ET.Element):
+        """
+        Writes an existing xml element with all its children, text and tail.
+        """
+        if self.beautify:
+            self._write_tree_beautified(element, 1)
+        else:
+            self._write_tree_plain(element)
+        self._flush_if_full()
+
+    def close(self):
+        """
+        Closes the osm root element and the file.
+        """
+        if self._file.closed:
+            return
+        self._chunk.append('</osm>')
+        self._flush()
+        self._file.close()
+
+    def _write_tree_plain(self, element: ET.Element):
+        """
+        A helper method that writes an element in the layout of ElementTree.write.
+        """
+        self._chunk.append('<' + element.tag + self._attributes(element.attrib))
+        if element.text or len(element):
+            self._chunk.append('>')
+            if element.text:
+                self._chunk.append(_escape_text(element.text))
+            for child in element:
+                self._write_tree_plain(child)
+            self._chunk.append('</' + element.tag + '>')
+        else:
+            self._chunk.append(' />')
+        if element.tail:
+            self._chunk.append(_escape_text(element.tail))
+
+    def _write_tree_beautified(self, element: ET.Element, depth: int):
+        """
+        A helper method that writes an element on separate lines and ignores whitespace between the elements.
+        """
+        indent = _INDENT * depth
+        text = element.text.strip() if element.text else ''
+        self._chunk.append(indent + '<' + element.tag + self._attributes(element.attrib))
+        if text or len(element):
+            self._chunk.append('>\n')
+            if text:
+                self._chunk.append(indent + _INDENT + _escape_text(text) + '\n')
+            for child in element:
+                self._write_tree_beautified(child, depth + 1)
+                tail = child.tail.strip() if child.tail else ''
+                if tail:
+                    self._chunk.append(indent + _INDENT + _escape_text(tail) + '\n')
+            self._chunk.append(indent + '</' + element.tag + '>\n')
+        else:
+            self._chunk.append('/>\n')
+
+    def _attributes(self, attributes: dict[str, str]) -> str:
+        """
+        A helper method that converts attributes into an escaped string with a leading space per attribute.
+        """
+        if self.beautify:
+            return ''.join(' ' + key + '=' + _quote_beautified(attributes[key]) for key in sorted(attributes))
+        return ''.join(' ' + key + '="' + _escape_attribute(value) + '"' for key, value in attributes.items())
+
+    def _flush_if_full(self):
+        """
+        A helper method that writes the current chunk if enough records are collected.
+        """
+        if len(self._chunk) >= self._chunk_size:
+            self._flush()
+
+    def _flush(self):
+        """
+        A helper method that writes the current chunk to the file.
+        """
+        self._file.write(''.join(self._chunk))
+        self._chunk = []
+
+
+_INDENT = '  '
+
+
+def _escape_text(text: str) -> str:
+    """
+    Escapes the characters of a text that are not allowed in xml.
+    """
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _escape_attribute(value: str) -> str:
+    """
+    Escapes an attribute value the same way as ElementTree does.
+    """
+    value = _escape_text(value)
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\t' in value:
+        value = value.replace('\t', '&#09;')
+    return value
+
+
+def _quote_beautified(value: str) -> str:
+    """
+    Escapes and quotes an attribute value; single quotes are used if the value contains only double quotes.
+    """
+    value = _escape_text(value)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', '&quot;') + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
@@ -1,10 +1,18 @@
+import re
+import time
 import xml.etree.ElementTree as ET  # TODO: replace with better Lib, ET doesn't ignore WhiteSpaces --> 'xyz' != ' xyz '
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Union
 
 from core.connection import Connection
-from core.geometry import centroid, simplify_polygon
-from core.osm_helper import beautify_xml
+from core.geometry import bounding_box, centroid, door_grid, simplify_polygon
+from core.grid_index import GridIndex
+from core.node_store import NodeStore
+from core.osm_writer import OsmWriter
 from core.room import Room
+from core.room_cache import RoomCache
+import core.tolerances as tolerances
 
 
 class Parser:
@@ -18,6 +26,10 @@ class Parser:
 
     Attributes
     ----------
+    bounds : ET.Element
+        The bounds element of the given osm file_name if there is one.
+    node_store : NodeStore
+        The coordinates of all nodes in the given osm file_name.
     rooms : list[Room]
         All rooms the can be found in the given osm file_name.
     potential_barriers : list[tuple[list[tuple[float, float]], str]]
@@ -26,6 +38,8 @@ class Parser:
         The representations of all doors as points.
     doors : dict[str, list[tuple[float, float]]]
         The collection of all doors as points per level
+    door_index : dict[str, GridIndex]
+        A grid of the doors per level to find the doors near an edge.
     ways : list[dict[str, Union[list[tuple[float, float]], str]]]
         The calculated ways with their type and level information.
     nodes : dict[str, dict[tuple[float, float], int]]
@@ -33,12 +47,15 @@ class Parser:
 
     Methods
     -------
-    find_ways(simplify_ways: bool, door_to_door: bool)
+    assign_doors()
+        Adds the doors to the rooms they belong to.
+    find_ways(simplify_ways: bool, door_to_door: bool, workers: int, cache: RoomCache)
         Calculates the ways for later navigation.
     def write_osm(file_name: str, beautify: bool)
         Creates a new file with the given name in OSM format to save the calculates ways for navigation.
     """
 
+    # patterns may match a key "tag[@k='...']", a value "tag[@v='...']" or both "tag[@k='...'][@v='...']"
     tags: dict[str, list[str]] = {
         'barriers': ["tag[@v='wall']", "tag[@v='bench']", "tag[@v='table']"],
         'doors': ["tag[@k='door']", "tag[@k='entrance']"],
@@ -48,173 +65,253 @@ class Parser:
     }
 
     def __init__(self, file_name: str):
-        self.root: ET.Element = ET.parse(file_name).getroot()
+        self.bounds: Union[ET.Element, None] = None
+        self.node_store: NodeStore = NodeStore()
+        self._node_tags: dict[str, dict[str, str]] = {}
+        self._way_nodes: dict[str, array] = {}
+        self._way_tags: dict[str, dict[str, str]] = {}
+        self._relation_members: dict[str, list[dict[str, str]]] = {}
+        self._relation_tags: dict[str, dict[str, str]] = {}
+        self._door_node_ids: list[str] = []
+        self._classified_ids: dict[str, list[str]] = {category: [] for category in Parser.tags}
+        self._tag_lookup: dict[tuple[Union[str, None], Union[str, None]], set[str]] = self._compile_tags(Parser.tags)
         self.rooms: list[Room] = []
         self.connections: list[Connection] = []
         self.doors: dict[str, list[tuple[float, float]]] = {}
+        self.door_index: dict[str, GridIndex] = {}
         self.potential_barriers: list[tuple[list[tuple[float, float]], str]] = []
         self.ways: list[dict[str, Union[list[tuple[float, float]], str]]] = []
         self.nodes: dict[str, dict[tuple[float, float], int]] = {}
+        self._doors_assigned: bool = False
+        self._barrier_index: dict[str, GridIndex] = {}
+        self._read_file(file_name)
         self._read_data()
 
+    def _read_file(self, file_name: str):
+        """
+        A helper method that streams the given file and classifies every node, way and relation once as it arrives.
+        Only coordinates, node references, members and tags are kept, the xml elements are freed right away.
+        """
+        context = ET.iterparse(file_name, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event == 'start':
+                continue
+            if element.tag == 'node':
+                element_id = element.get('id')
+                self.node_store.add(element_id, float(element.get('lat')), float(element.get('lon')))
+                tags = self._read_tags(element)
+                if tags:
+                    self._node_tags[element_id] = tags
+                    if 'doors' in self._classify(tags):
+                        self._door_node_ids.append(element_id)
+            elif element.tag == 'way':
+                element_id = element.get('id')
+                node_ids = (nd.get('ref') for nd in element.iter('nd'))
+                self._way_nodes[element_id] = self.node_store.indices(node_ids, reserve=True)
+                tags = self._read_tags(element)
+                if tags:
+                    self._way_tags[element_id] = tags
+                    for category in self._classify(tags) & {'doors', 'barriers', 'rooms'}:
+                        self._classified_ids[category].append(element_id)
+            elif element.tag == 'relation':
+                element_id = element.get('id')
+                self._relation_members[element_id] = [dict(member.attrib) for member in element.iter('member')]
+                tags = self._read_tags(element)
+                self._relation_tags[element_id] = tags
+                for category in self._classify(tags) & {'multipolygons', 'connections'}:
+                    self._classified_ids[category].append(element_id)
+            elif element.tag == 'bounds':
+                self.bounds = element
+            else:
+                continue  # children like tag, nd and member are read together with their parent
+            root.clear()  # free the processed element
+
+    @staticmethod
+    def _read_tags(element: ET.Element) -> dict[str, str]:
+        """
+        A helper method that collects the tags of an element as a dict of keys and values.
+        """
+        return {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+
+    @staticmethod
+    def _compile_tags(tags: dict[str, list[str]]) \
+            -> dict[tuple[Union[str, None], Union[str, None]], set[str]]:
+        """
+        A helper method that compiles the tag patterns of every category into a lookup.
+        Patterns like "tag[@k='door']", "tag[@v='wall']" or "tag[@k='indoor'][@v='room']" are keyed on (k, None),
+        (None, v) and (k, v).
+        """
+        lookup = {}
+        for category, patterns in tags.items():
+            for pattern in patterns:
+                match = re.fullmatch(r"tag(?:\[@k='([^']*)'\])?(?:\[@v='([^']*)'\])?", pattern)
+                if match is None or match.groups() == (None, None):
+                    raise ValueError(f"Unsupported tag pattern {pattern} for category {category}")
+                lookup.setdefault(match.groups(), set()).add(category)
+        return lookup
+
+    def _classify(self, tags: dict[str, str]) -> set[str]:
+        """
+        A helper method that finds all categories of Parser.tags an element with the given tags belongs to.
+        """
+        categories = set()
+        for key, value in tags.items():
+            for pattern in ((key, value), (key, None), (None, value)):
+                if pattern in self._tag_lookup:
+                    categories |= self._tag_lookup[pattern]
+        return categories
+
     def _read_data(self):
         """
-        A helper method that parses the given data.
+        A helper method that processes the classified data.
         Collects information about important nodes (doors), ways (rooms), and relations (connections and multipolygons).
         """
-        # parse nodes to find doors
-        for element in self.root.findall("./node[tag]"):
-            for tag in Parser.tags['doors']:
-                if element.find(tag) is not None:
-                    self._parse_door(element, is_node=True)
-                    break
-
-        # parse ways to find doors
-        for element in self.root.findall("./way[tag]"):
-            for tag in Parser.tags['doors']:
-                if element.find(tag) is not None:
-                    self._parse_door(element, is_node=False)
-                    break
-
-        # parse ways to find potential inner_barriers
-        for element in self.root.findall("./way[tag]"):
-            for tag in Parser.tags['barriers']:
-                if element.find(tag) is not None:
-                    self.potential_barriers.append(self._parse_polygon(element))
-                    break
+        # find doors given as nodes or ways
+        for node_id in self._door_node_ids:
+            self._parse_door(node_id, is_node=True)
+        for way_id in self._classified_ids['doors']:
+            self._parse_door(way_id, is_node=False)
+        for level, level_doors in self.doors.items():
+            self.door_index[level] = door_grid(level_doors)
+
+        # find potential inner_barriers
+        for way_id in self._classified_ids['barriers']:
+            self.potential_barriers.append(self._parse_polygon(way_id))
 
         for polygon in self.potential_barriers:
             simplify_polygon(polygon[0])
+        self._index_barriers()
+
+        # find rooms
+        for way_id in self._classified_ids['rooms']:
+            polygon, level = self._parse_polygon(way_id)
+            self.rooms.append(Room(polygon, level, self._barriers_near(polygon, level)))
 
-        # parse ways to find rooms
-        for element in self.root.findall("./way[tag]"):
-            for tag in Parser.tags['rooms']:
-                if element.find(tag) is not None:
-                    polygon, level = self._parse_polygon(element)
-                    self.rooms.append(Room(polygon, level, self.potential_barriers))
-                    break
-
-        # parse relations to find multipolygons
-        for element in self.root.findall("./relation"):
-            for tag in Parser.tags['multipolygons']:
-                if element.find(tag) is not None:
-                    polygon, level, barriers = self._parse_multipolygon(element)
-                    if polygon is not None:
-                        self.rooms.append(Room(polygon, level, self.potential_barriers, inner_barriers=barriers))
-                    break
+        # find multipolygons
+        for relation_id in self._classified_ids['multipolygons']:
+            polygon, level, barriers = self._parse_multipolygon(relation_id)
+            if polygon is not None:
+                self.rooms.append(Room(polygon, level, self._barriers_near(polygon, level), inner_barriers=barriers))
 
         self._remove_duplicated_rooms()
 
-        # parse relations to find connections between different levels
-        for element in self.root.findall("./relation"):
-            for tag in Parser.tags['connections']:
-                if element.find(tag) is not None:
-                    members, con_type = self._parse_connection(element)
-                    self.connections.append(Connection(members, con_type))
-                    break
+        # find connections between different levels
+        for relation_id in self._classified_ids['connections']:
+            members, con_type = self._parse_connection(relation_id)
+            self.connections.append(Connection(members, con_type))
 
-    def _parse_door(self, element: ET.Element, is_node=True):
+    def _index_barriers(self):
+        """
+        A helper method that registers the bounding boxes of all potential barriers in a grid per level.
+        The cell size of a level is the average extent of its barriers.
+        """
+        boxes: dict[str, list[tuple[int, tuple[float, float, float, float]]]] = {}
+        for i, (polygon, level) in enumerate(self.potential_barriers):
+            if polygon:
+                boxes.setdefault(level, []).append((i, bounding_box(polygon)))
+        for level, level_boxes in boxes.items():
+            extents = [max(box[2] - box[0], box[3] - box[1]) for _, box in level_boxes]
+            cell_size = sum(extents) / len(extents) or 1.
+            self._barrier_index[level] = GridIndex(cell_size)
+            for i, box in level_boxes:
+                self._barrier_index[level].insert(i, box)
+
+    def _barriers_near(self, polygon: list[tuple[float, float]], level: str) \
+            -> list[tuple[list[tuple[float, float]], str]]:
+        """
+        A helper method that returns the potential barriers of the level whose bounding boxes overlap the one of the
+        polygon, in their original order.
+        """
+        if level not in self._barrier_index or not polygon:
+            return []
+        box = bounding_box(polygon, margin=tolerances.general_mapping_uncertainty)
+        return [self.potential_barriers[i] for i in self._barrier_index[level].query(box)]
+
+    def _coordinates(self, way_id: str, closed: bool = True) -> list[tuple[float, float]]:
+        """
+        A helper method that returns the coordinates of all nodes referenced by a way.
+        The repeated last node of a closed way is left out.
+        """
+        indices = self._way_nodes[way_id]
+        if closed:
+            indices = indices[:-1]
+        return self.node_store.polygon(indices)
+
+    def _parse_door(self, element_id: str, is_node=True):
         """
         A helper method that adds a door element (a node or the centroid of a closed way) to the list of doors.
         This list is sorted by level.
         """
-        level = element.find("tag[@k='level']").get('v')
-        if level not in self.doors:
-            self.doors[level] = []
-
         if is_node:
-            door = (float(element.get('lat')), float(element.get('lon')))
+            level = self._node_tags[element_id]['level']
+            door = self.node_store.coordinates(self.node_store.index(element_id))
         else:
-            coordinates = []
-            for nd in element.findall("nd")[:-1]:
-                node = self.root.find("./node[@id='" + nd.get('ref') + "']")  # find referenced node
-                coordinates.append((float(node.get('lat')), float(node.get('lon'))))
-            door = centroid(coordinates)
+            level = self._way_tags[element_id]['level']
+            door = centroid(self._coordinates(element_id))
+        if level not in self.doors:
+            self.doors[level] = []
         self.doors[level].append(door)
 
-    def _parse_polygon(self, element: ET.Element) -> tuple[list[tuple[float, float]], str]:
+    def _parse_polygon(self, way_id: str) -> tuple[list[tuple[float, float]], str]:
         """
         A helper method that converts a room element (way) into its corresponding polygon (list of points).
         """
-        polygon = []
-        for nd in element.findall("nd")[:-1]:
-            node = (self.root.find("./node[@id='" + nd.get('ref') + "']"))
-            x = float(node.get('lat'))
-            y = float(node.get('lon'))
-            polygon.append((x, y))
-        level = element.find("tag[@k='level']").get('v')
-        return polygon, level
+        return self._coordinates(way_id), self._way_tags[way_id]['level']
 
-    def _parse_connection(self, element: ET.Element) \
+    def _parse_connection(self, relation_id: str) \
             -> tuple[list[dict[str, Union[list[tuple[float, float]], str]]], str]:
         """
         A helper method that converts a connection element (relation) into a list of the corresponding polygons.
         """
         connections = []
         con_type = 'other'
-        for member in element.findall("member"):
-            polygon = []
-            connector = self.root.find("./way[@id='" + member.get('ref') + "']")
-            for nd in connector.findall("nd"):
-                node = self.root.find("./node[@id='" + nd.get('ref') + "']")
-                x = float(node.get('lat'))
-                y = float(node.get('lon'))
-                polygon.append((x, y))
-            connection = {'connector': polygon, 'level': connector.find("tag[@k='level']").get('v')}
+        for member in self._relation_members[relation_id]:
+            polygon = self._coordinates(member['ref'], closed=False)
+            connection = {'connector': polygon, 'level': self._way_tags[member['ref']]['level']}
             connections.append(connection)
-            if element.find("tag[@v='stairs']") is not None:
+            if 'stairs' in self._relation_tags[relation_id].values():
                 con_type = 'stairs'
             else:  # edit if there are more types of connections
                 con_type = 'elevator'
         return connections, con_type
 
-    def _parse_multipolygon(self, element: ET.Element) \
+    def _parse_multipolygon(self, relation_id: str) \
             -> Union[tuple[list[tuple[float, float]], str, list[list[tuple[float, float]]]],
                      tuple[None, None, None]]:
         """
         A helper method that converts a multipolygon element (relation) into its corresponding outer polygon and inner
         barriers (also polygons).
         """
-        polygon = []
         barriers = []
+        members = self._relation_members[relation_id]
+        tags = self._relation_tags[relation_id]
 
-        # element is a Element 'relation' with attributes like {'id': '-57497', 'action': 'modify'}
-        outer_ref = element.find("member[@role='outer']")
-        # outer_ref is a Element 'member' with attributes like {'type': 'way', 'ref': '-56945', 'role': 'outer'}
-        outer = self.root.find("./way[@id='" + outer_ref.get('ref') + "']")
-        # outer is a Element 'way' with attributes like {'id': '-56945', 'action': 'modify'}
+        # members are dicts like {'type': 'way', 'ref': '-56945', 'role': 'outer'}
+        outer_id = next(member['ref'] for member in members if member.get('role') == 'outer')
+        outer_tags = self._way_tags.get(outer_id, {})
 
         # find the level and the indoor tag in either the multipolygon or the outer ways
-        if element.find("tag[@k='level']") is not None:
-            level = element.find("tag[@k='level']").get('v')
-        elif outer.find("tag[@k='level']") is not None:
-            level = outer.find("tag[@k='level']").get('v')
+        if 'level' in tags:
+            level = tags['level']
+        elif 'level' in outer_tags:
+            level = outer_tags['level']
         else:
-            raise ValueError(f"No level tag found in Multipolygon {element} with Attributes {element.attrib}")
-        if element.find("tag[@k='indoor']") is not None:
-            building_element = element.find("tag[@k='indoor']").get('v')
-        elif outer.find("tag[@k='indoor']") is not None:
-            building_element = outer.find("tag[@k='indoor']").get('v')
+            raise ValueError(f"No level tag found in Multipolygon {relation_id} with Tags {tags}")
+        if 'indoor' in tags:
+            building_element = tags['indoor']
+        elif 'indoor' in outer_tags:
+            building_element = outer_tags['indoor']
         else:
-            raise ValueError(f"No indoor tag found in Multipolygon {element} with Attributes {element.attrib}")
+            raise ValueError(f"No indoor tag found in Multipolygon {relation_id} with Tags {tags}")
 
         # parse the multipolygon
         if building_element == 'room' or building_element == 'corridor':
-            for member in element.findall("member[@role='inner']"):
-                barrier = []
-                inner = self.root.find("./way[@id='" + member.get('ref') + "']")
-                for nd in inner.findall("nd")[:-1]:
-                    node = self.root.find("./node[@id='" + nd.get('ref') + "']")
-                    x = float(node.get('lat'))
-                    y = float(node.get('lon'))
-                    barrier.append((x, y))
-                barriers.append(barrier)
-
-            for nd in outer.findall("nd")[:-1]:
-                node = self.root.find("./node[@id='" + nd.get('ref') + "']")
-                x = float(node.get('lat'))
-                y = float(node.get('lon'))
-                polygon.append((x, y))
+            for member in members:
+                if member.get('role') == 'inner':
+                    barriers.append(self._coordinates(member['ref']))
+
+            polygon = self._coordinates(outer_id)
             return polygon, level, barriers
         else:
             return None, None, None
@@ -222,113 +319,157 @@ class Parser:
     def _remove_duplicated_rooms(self):
         """
         A helper method that removes duplicate rooms due to parsing for rooms and multipolygons which can be rooms too.
-        It is assumed that multipolygon-rooms are more precise and parsed after way-rooms.
+        It is assumed that multipolygon-rooms are more precise and parsed after way-rooms, so the last room with the
+        same signature is kept.
         """
-        n1 = len(self.rooms) - 2
-        while n1 >= 0:
-            room1 = self.rooms[n1]
-
-            n2 = len(self.rooms) - 1
-            while n2 > n1:
-                room2 = self.rooms[n2]
+        signatures = [self._room_signature(room) for room in self.rooms]
+        last_index = {signature: i for i, signature in enumerate(signatures)}
+        self.rooms = [room for i, room in enumerate(self.rooms) if last_index[signatures[i]] == i]
 
-                if room1 != room2 and room1.level == room2.level and room1.polygon == room2.polygon:
-                    self.rooms.remove(room1)
-                    break
-                n2 -= 1
-            n1 -= 1
+    @staticmethod
+    def _room_signature(room: Room) -> tuple[str, tuple[tuple[float, float], ...]]:
+        """
+        A helper method that creates the level and the polygon of a room independent of its start point and order.
+        """
+        polygon = room.polygon
+        if not polygon:
+            return room.level, ()
+        start = polygon.index(min(polygon))
+        forward = tuple(polygon[start:] + polygon[:start])
+        backward = (forward[0],) + forward[:0:-1]
+        return room.level, min(forward, backward)
+
+    def assign_doors(self):
+        """
+        Adds the doors to the rooms they belong to; further calls have no effect.
+        """
+        if self._doors_assigned:
+            return
+        for room in self.rooms:
+            room.add_doors(self.doors, self.door_index)
+        self._doors_assigned = True
 
-    def find_ways(self, simplify_ways_much: bool, door_to_door: bool):
+    def find_ways(self, simplify_ways_much: bool, door_to_door: bool, workers: int = 1,
+                  cache: Union[RoomCache, None] = None):
         """
         Calculates the ways for later navigation.
+        With more than one worker the rooms are distributed across a process pool, the most expensive rooms first;
+        their ways are still gathered in the order of the rooms, so the result equals the one of a serial run.
+        With a cache only the rooms that changed since an earlier run are calculated.
         """
-        i = 0
-        for room in self.rooms:
-            i += 1
-            print("room #", i, '/', len(self.rooms), end=' ', flush=True)
-            room.add_doors(self.doors)
-            self.ways += room.find_ways(simplify_ways_much, door_to_door)
-            print("completed.")
+        self.assign_doors()
+        costs = [room.estimated_cost() for room in self.rooms]
+
+        room_ways: list[Union[list[dict[str, Union[list[tuple[float, float]], str]]], None]] = [None] * len(self.rooms)
+        keys = []
+        if cache is not None:
+            keys = [cache.key(room, simplify_ways_much, door_to_door) for room in self.rooms]
+            for i, key in enumerate(keys):
+                room_ways[i] = cache.load(key)
+        pending = [i for i in range(len(self.rooms)) if room_ways[i] is None]
+        if cache is not None:
+            print(f"rooms loaded from cache: {len(self.rooms) - len(pending)} / {len(self.rooms)}", flush=True)
+        # only the rooms that are calculated count for the progress and the estimated remaining time
+        progress = _Progress({i: costs[i] for i in pending})
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_find_room_ways, self.rooms[i], simplify_ways_much, door_to_door): i
+                           for i in sorted(pending, key=lambda i: costs[i], reverse=True)}
+                for future in as_completed(futures):
+                    room_ways[futures[future]] = future.result()
+                    progress.completed(futures[future])
+        else:
+            for i in pending:
+                room_ways[i] = self.rooms[i].find_ways(simplify_ways_much, door_to_door)
+                progress.completed(i)
+
+        if cache is not None:
+            for i in pending:
+                cache.store(keys[i], room_ways[i])
+            cache.evict()
+        for ways in room_ways:
+            self.ways += ways
 
         for connection in self.connections:
-            self.ways += connection.find_ways(self.doors)
+            self.ways += connection.find_ways(self.doors, self.door_index)
 
     def write_osm(self, file_name: str, beautify: bool):
         """
         Creates a new file with the given name in OSM format to save the calculates ways for navigation.
         """
-        # create a root Element for the data
-        osm_root = ET.Element("osm", version='0.6', upload='false')
-
-        # add bounds information if given in the original file
-        bounds_element = self.root.find("bounds")
-        if bounds_element is not None:
-            osm_root.append(bounds_element)
-
-        # add points and cache ways
-        processed = {}
-        osm_node_id = -2
-        osm_way_id = -2
-        osm_ways = []
-        for way in self.ways:
-            osm_way = ET.Element("way", id=str(osm_way_id))
-            osm_way_id -= 1
-            level = way['level']
-            if ';' in level:  # way connecting two levels --> only two nodes
-                levels = level.split(';')
-                if levels[0] not in self.nodes:
-                    self.nodes[levels[0]] = {}
-                    processed[levels[0]] = []
-                if levels[1] not in self.nodes:
-                    self.nodes[levels[1]] = {}
-                    processed[levels[1]] = []
-
-                if way['way'][0] not in self.nodes[levels[0]]:
-                    self.nodes[levels[0]][way['way'][0]] = osm_node_id
-                    osm_node_id -= 1
-                    ET.SubElement(osm_root, "node", id=str(self.nodes[levels[0]][way['way'][0]]),
-                                  lat=str(way['way'][0][0]),
-                                  lon=str(way['way'][0][1]))
-                    processed[levels[0]].append(way['way'][0])
-
-                if way['way'][1] not in self.nodes[levels[1]]:
-                    self.nodes[levels[1]][way['way'][1]] = osm_node_id
-                    osm_node_id -= 1
-                    ET.SubElement(osm_root, "node", id=str(self.nodes[levels[1]][way['way'][1]]),
-                                  lat=str(way['way'][1][0]),
-                                  lon=str(way['way'][1][1]))
-                    processed[levels[1]].append(way['way'][1])
-
-                ET.SubElement(osm_way, "nd", ref=str(self.nodes[levels[0]][way['way'][0]]))
-                ET.SubElement(osm_way, "nd", ref=str(self.nodes[levels[1]][way['way'][1]]))
+        with OsmWriter(file_name, beautify) as writer:
+            writer.start({'version': '0.6', 'upload': 'false'})
+
+            # add bounds information if given in the original file
+            if self.bounds is not None:
+                writer.write_tree(self.bounds)
+
+            # add points
+            osm_node_id = -2
+            for way in self.ways:
+                for node, level in self._way_points(way):
+                    if level not in self.nodes:
+                        self.nodes[level] = {}
+                    if node not in self.nodes[level]:
+                        self.nodes[level][node] = osm_node_id
+                        osm_node_id -= 1
+                        writer.write_element('node', {'id': str(self.nodes[level][node]),
+                                                      'lat': str(node[0]), 'lon': str(node[1])})
+
+            # add ways after points
+            osm_way_id = -2
+            for way in self.ways:
+                children = [('nd', {'ref': str(self.nodes[level][node])}) for node, level in self._way_points(way)]
+                children.append(('tag', {'k': 'indoor', 'v': 'yes'}))
+                children.append(('tag', {'k': 'level', 'v': way['level']}))
+                children.append(('tag', {'k': 'highway', 'v': way['type']}))
+                writer.write_element('way', {'id': str(osm_way_id)}, children)
+                osm_way_id -= 1
+
+    @staticmethod
+    def _way_points(way: dict[str, Union[list[tuple[float, float]], str]]) -> list[tuple[tuple[float, float], str]]:
+        """
+        A helper method that returns the points of a way together with the level they are written on.
+        """
+        level = way['level']
+        if ';' in level:  # way connecting two levels --> only two nodes
+            levels = level.split(';')
+            return [(way['way'][0], levels[0]), (way['way'][1], levels[1])]
+        return [(node, level) for node in way['way']]
 
-            else:
-                if level not in self.nodes:
-                    self.nodes[level] = {}
-                    processed[level] = []
-                for node in way['way']:
-                    if node not in processed[level]:
-                        if node not in self.nodes[level]:
-                            self.nodes[level][node] = osm_node_id
-                            osm_node_id -= 1
-                        ET.SubElement(osm_root, "node", id=str(self.nodes[level][node]), lat=str(node[0]),
-                                      lon=str(node[1]))
-                        processed[level].append(node)
-                    ET.SubElement(osm_way, "nd", ref=str(self.nodes[way['level']][node]))
-
-            ET.SubElement(osm_way, "tag", k="indoor", v="yes")
-            ET.SubElement(osm_way, "tag", k="level", v=way['level'])
-            ET.SubElement(osm_way, "tag", k="highway", v=way['type'])
-            osm_ways.append(osm_way)
-
-        # add ways after points
-        for osm_way in osm_ways:
-            osm_root.append(osm_way)
-
-        # finalize tree
-        tree = ET.ElementTree(osm_root)
-        tree.write(file_name, encoding='utf-8', xml_declaration=True)
-
-        # polish up xml file if flag is set
-        if beautify:
-            beautify_xml(file_name)
+
+def _find_room_ways(room: Room, simplify_ways_much: bool, door_to_door: bool) \
+        -> list[dict[str, Union[list[tuple[float, float]], str]]]:
+    """
+    Calculates the ways of a single room; defined on module level to be usable by a process pool.
+    """
+    return room.find_ways(simplify_ways_much, door_to_door)
+
+
+class _Progress:
+    """
+    A helper class that prints the number of completed rooms and the estimated remaining time.
+    The remaining time is extrapolated from the estimated costs of the completed and the remaining rooms.
+    """
+
+    def __init__(self, costs: dict[int, float]):
+        self.costs: dict[int, float] = costs  # the estimated costs by the indices of the rooms to calculate
+        self.total_cost: float = sum(costs.values())
+        self.done_cost: float = 0.
+        self.done: int = 0
+        self.start: float = time.perf_counter()
+
+    def completed(self, index: int):
+        """
+        Marks the room with the given index as completed and prints the progress.
+        """
+        self.done += 1
+        self.done_cost += self.costs[index]
+        elapsed = time.perf_counter() - self.start
+        if self.done_cost > 0:
+            remaining = elapsed * (self.total_cost - self.done_cost) / self.done_cost
+        else:
+            remaining = 0.
+        print(f"rooms completed: {self.done} / {len(self.costs)}, "
+              f"elapsed {elapsed:.0f} s, remaining about {remaining:.0f} s", flush=True)
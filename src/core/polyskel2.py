@@ -6,6 +6,7 @@ Implementation of the straight skeleton algorithm as described by Felkel and Obd
 
 import heapq
 from core.euclid import *
+from core.grid_index import GridIndex
 from itertools import *
 from collections import namedtuple
 
@@ -48,10 +49,50 @@ def _window(lst):
 
 
 def _cross(a, b):
-    res = a.x * b.y - b.x * a.y
+    res = a[0] * b[1] - b[0] * a[1]
     return res
 
 
+# The following helpers work on plain floats and repeat the arithmetic of the euclid classes step by step, so the
+# skeleton is the same as with Point2, Vector2, Line2 and Ray2 objects, but no objects are created for the
+# intermediate vectors and lines.
+
+def _normalized(x, y):
+    d = math.sqrt(x ** 2 + y ** 2)
+    if d:
+        return x / d, y / d
+    return x, y
+
+
+def _distance(ax, ay, bx, by):
+    return math.sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+
+
+def _line_distance(px, py, vx, vy, x, y):
+    # the distance of a point from the line through (px, py) with direction (vx, vy)
+    d = vx ** 2 + vy ** 2
+    u = ((x - px) * vx + (y - py) * vy) / d
+    return _distance(x, y, px + u * vx, py + u * vy)
+
+
+def _intersect(ax, ay, avx, avy, a_is_ray, bx, by, bvx, bvy, b_is_ray):
+    # the intersection of two lines or rays given by a point and a direction, or None
+    d = bvy * avx - bvx * avy
+    if d == 0:
+        return None
+
+    dy = ay - by
+    dx = ax - bx
+    ua = (bvx * dy - bvy * dx) / d
+    if a_is_ray and not ua >= 0.0:
+        return None
+    ub = (avx * dy - avy * dx) / d
+    if b_is_ray and not ub >= 0.0:
+        return None
+
+    return ax + ua * avx, ay + ua * avy
+
+
 def _approximately_equals(a, b):
     return a == b or (abs(a - b) <= max(abs(a), abs(b)) * 0.001)
 
@@ -82,7 +123,27 @@ class _EdgeEvent(namedtuple("_EdgeEvent", "distance intersection_point vertex_a
                                                              self.vertex_b)
 
 
-_OriginalEdge = namedtuple("_OriginalEdge", "edge bisector_left, bisector_right")
+_MIN_INDEXED_EDGES = 64
+""" the number of original edges from which on the split event search uses grids """
+
+
+class _Edge(LineSegment2):
+    """
+    A polygon edge that keeps its line as plain floats (px, py, vx, vy) and its unit direction, which are needed again
+    for every event that involves the edge.
+    """
+    __slots__ = ("line", "unit", "key")
+
+    def __init__(self, start, end):
+        LineSegment2.__init__(self, start, end)
+        self.line = (self.p.x, self.p.y, self.v.x, self.v.y)
+        self.unit = _normalized(self.v.x, self.v.y)
+        # edges with the same start point and direction are pieces of the same original edge
+        self.key = (self.p.x, self.p.y) + self.unit
+
+
+# the bisectors of the two vertices of an original edge are given by their start points and unit directions
+_OriginalEdge = namedtuple("_OriginalEdge", "edge, left_point, left_unit, right_point, right_unit")
 
 Subtree = namedtuple("Subtree", "source, height, sinks")
 
@@ -93,6 +154,9 @@ def _side(point, line):
 
 
 class _LAVertex:
+    __slots__ = ("point", "edge_left", "edge_right", "prev", "next", "lav", "_valid", "_is_reflex", "_bisector_x",
+                 "_bisector_y")
+
     def __init__(self, point, edge_left, edge_right, direction_vectors=None):
         self.point = point
         self.edge_left = edge_left
@@ -102,18 +166,21 @@ class _LAVertex:
         self.lav = None
         self._valid = True;  # this should be handled better. Maybe membership in lav implies validity?
 
-        creator_vectors = (edge_left.v.normalized() * -1, edge_right.v.normalized())
+        left_x, left_y = edge_left.unit
+        creator_vectors = ((left_x * -1, left_y * -1), edge_right.unit)
         if direction_vectors is None:
             direction_vectors = creator_vectors
         self._is_reflex = (_cross(*direction_vectors)) < 0
-        self._bisector = Ray2(self.point, operator.add(*creator_vectors) * (-1 if self.is_reflex else 1))
+        sign = -1 if self.is_reflex else 1
+        self._bisector_x = (creator_vectors[0][0] + creator_vectors[1][0]) * sign
+        self._bisector_y = (creator_vectors[0][1] + creator_vectors[1][1]) * sign
        # log.info("Created vertex %s", self.__repr__())
-        _debug.line((self.bisector.p.x, self.bisector.p.y, self.bisector.p.x + self.bisector.v.x,
-                     self.bisector.p.y + self.bisector.v.y ), fill="blue")
+        _debug.line((self.point.x, self.point.y, self.point.x + self._bisector_x,
+                     self.point.y + self._bisector_y), fill="blue")
 
     @property
     def bisector(self):
-        return self._bisector
+        return Ray2(self.point, Vector2(self._bisector_x, self._bisector_y))
 
     @property
     def is_reflex(self):
@@ -125,71 +192,94 @@ class _LAVertex:
 
     def next_event(self):
         events = []
+        edge_events = []
+        point = self.point
+        prev = self.prev
+        next = self.next
+        i_prev = _intersect(prev.point.x, prev.point.y, prev._bisector_x, prev._bisector_y, True,
+                            point.x, point.y, self._bisector_x, self._bisector_y, True)
+        i_next = _intersect(next.point.x, next.point.y, next._bisector_x, next._bisector_y, True,
+                            point.x, point.y, self._bisector_x, self._bisector_y, True)
+
+        if i_prev is not None:
+            edge_events.append(_EdgeEvent(_line_distance(*self.edge_left.line, *i_prev),
+                                          Point2(*i_prev), prev, self))
+        if i_next is not None:
+            edge_events.append(_EdgeEvent(_line_distance(*self.edge_right.line, *i_next),
+                                          Point2(*i_next), self, next))
+
         if self.is_reflex:
             # a reflex vertex may generate a split event
             # split events happen when a vertex hits an opposite edge, splitting the polygon in two.
            # log.debug("looking for split candidates for vertex %s", self)
-            for edge in self.original_edges:
-                if edge.edge == self.edge_left or edge.edge == self.edge_right:
-                    continue
-
-               # log.debug("\tconsidering EDGE %s", edge)
-
-                # a potential b is at the intersection of between our own bisector and the bisector of the
-                # angle between the tested edge and any one of our own edges.
-
-                # we choose the "less parallel" edge (in order to exclude a potentially parallel edge)
-                leftdot = abs(self.edge_left.v.normalized().dot(edge.edge.v.normalized()))
-                rightdot = abs(self.edge_right.v.normalized().dot(edge.edge.v.normalized()))
-                selfedge = self.edge_left if leftdot < rightdot else self.edge_right
-                otheredge = self.edge_left if leftdot > rightdot else self.edge_right
-
-                i = Line2(selfedge).intersect(Line2(edge.edge))
-                if i is not None and not _approximately_equals(i, self.point):
-                    # locate candidate b
-                    linvec = (self.point - i).normalized()
-                    edvec = edge.edge.v.normalized()
-                    if linvec.dot(edvec) < 0:
-                        edvec = -edvec
-
-                    bisecvec = edvec + linvec
-                    if abs(bisecvec) == 0:
-                        continue
-                    bisector = Line2(i, bisecvec)
-                    b = bisector.intersect(self.bisector)
-
-                    if b is None:
-                        continue
-
-                    # check eligibility of b
-                    # a valid b should lie within the area limited by the edge and the bisectors of its two vertices:
-                    xleft = _cross(edge.bisector_left.v.normalized(), (b - edge.bisector_left.p).normalized()) > 0
-                    xright = _cross(edge.bisector_right.v.normalized(), (b - edge.bisector_right.p).normalized()) < 0
-                    xedge = _cross(edge.edge.v.normalized(), (b - edge.edge.p).normalized()) < 0
-
-                    if not (xleft and xright and xedge):
-                      #  log.debug("\t\tDiscarded candidate %s (%s-%s-%s)", b, xleft, xright, xedge)
-                        continue
-
-                   # log.debug("\t\tFound valid candidate %s", b)
-                    events.append(_SplitEvent(Line2(edge.edge).distance(b), b, self, edge.edge))
-
-        i_prev = self.bisector.intersect(self.prev.bisector)
-        i_next = self.bisector.intersect(self.next.bisector)
+            # only the nearest event is needed, so the edges are visited by growing distance until no farther edge
+            # can yield a closer split event; the events are kept in the order of the original edges
+            closest = min((_distance(point.x, point.y, event.intersection_point.x, event.intersection_point.y)
+                           for event in edge_events), default=float('inf'))
+            split_events = []
+            slav = self.lav._slav
+            for indices, reach in slav.edges_near(self):
+                for index, intersection in slav.split_candidates(self, indices):
+                    event = self._split_event(self.original_edges[index], intersection)
+                    if event is not None:
+                        split_events.append((index, event))
+                        closest = min(closest, _distance(point.x, point.y,
+                                                         event.intersection_point.x, event.intersection_point.y))
+                if reach * (1 - 1e-6) > closest:
+                    break
+            events.extend(event for _, event in sorted(split_events, key=lambda item: item[0]))
 
-        if i_prev is not None:
-            events.append(_EdgeEvent(Line2(self.edge_left).distance(i_prev), i_prev, self.prev, self))
-        if i_next is not None:
-            events.append(_EdgeEvent(Line2(self.edge_right).distance(i_next), i_next, self, self.next))
+        events.extend(edge_events)
 
         if not events:
             return None
 
-        ev = min(events, key=lambda event: self.point.distance(event.intersection_point))
+        ev = min(events, key=lambda event: _distance(point.x, point.y,
+                                                     event.intersection_point.x, event.intersection_point.y))
 
        # log.info("Generated new event for %s: %s", self, ev)
         return ev
 
+    def _split_event(self, edge, i):
+        # i is the intersection of the line of the tested edge with the line of the less parallel own edge, as found
+        # by _SLAV.split_candidates
+       # log.debug("\tconsidering EDGE %s", edge)
+
+        # a potential b is at the intersection of between our own bisector and the bisector of the
+        # angle between the tested edge and any one of our own edges.
+        opposite = edge.edge
+        edge_x, edge_y = opposite.unit
+        point = self.point
+        # locate candidate b
+        lin_x, lin_y = _normalized(point.x - i[0], point.y - i[1])
+        if lin_x * edge_x + lin_y * edge_y < 0:
+            edge_x, edge_y = -edge_x, -edge_y
+
+        bisec_x = edge_x + lin_x
+        bisec_y = edge_y + lin_y
+        if math.sqrt(bisec_x ** 2 + bisec_y ** 2) == 0:
+            return None
+        b = _intersect(point.x, point.y, self._bisector_x, self._bisector_y, True,
+                       i[0], i[1], bisec_x, bisec_y, False)
+
+        if b is None:
+            return None
+
+        # check eligibility of b
+        # a valid b should lie within the area limited by the edge and the bisectors of its two vertices:
+        left = edge.left_point
+        right = edge.right_point
+        xleft = _cross(edge.left_unit, _normalized(b[0] - left[0], b[1] - left[1])) > 0
+        xright = _cross(edge.right_unit, _normalized(b[0] - right[0], b[1] - right[1])) < 0
+        xedge = _cross(opposite.unit, _normalized(b[0] - opposite.line[0], b[1] - opposite.line[1])) < 0
+
+        if not (xleft and xright and xedge):
+          #  log.debug("\t\tDiscarded candidate %s (%s-%s-%s)", b, xleft, xright, xedge)
+            return None
+
+       # log.debug("\t\tFound valid candidate %s", b)
+        return _SplitEvent(_line_distance(*opposite.line, *b), Point2(*b), self, opposite)
+
     def invalidate(self):
         if self.lav is not None:
             self.lav.invalidate(self)
@@ -217,15 +307,134 @@ class _LAVertex:
 
 class _SLAV:
     def __init__(self, polygon, holes):
+        # the live vertices by the keys of their left and right edges
+        self._left_vertices = {}
+        self._right_vertices = {}
+        self._rings_intact = True
         contours = [_normalize_contour(polygon)]
         if holes != {}:
             contours.extend([_normalize_contour(hole) for hole in holes])
         self._lavs = [_LAV.from_polygon(contour, self) for contour in contours]
 
         # store original polygon edges for calculating split events
-        self._original_edges = [
-            _OriginalEdge(LineSegment2(vertex.prev.point, vertex.point), vertex.prev.bisector, vertex.bisector) for
-            vertex in chain.from_iterable(self._lavs)]
+        self._original_edges = []
+        for vertex in chain.from_iterable(self._lavs):
+            start = vertex.prev
+            self._original_edges.append(_OriginalEdge(
+                _Edge(start.point, vertex.point),
+                (start.point.x, start.point.y), _normalized(start._bisector_x, start._bisector_y),
+                (vertex.point.x, vertex.point.y), _normalized(vertex._bisector_x, vertex._bisector_y)))
+        # the edge objects, unit directions and lines of the original edges as rows for split_candidates
+        self._edge_rows = [(edge.edge,) + edge.edge.unit + edge.edge.line for edge in self._original_edges]
+        self._index_original_edges()
+
+    def _index_original_edges(self):
+        """
+        Registers the original edges in grids for the split event search of reflex vertices.
+
+        A split point b of an edge lies between the bisectors of its two vertices at some height h above the edge,
+        so b is at most h * spread away from the edge, where spread is the reciprocal sine of the flatter angle between
+        the edge and these bisectors. As b is as high above the edge as above the line of an edge of the reflex vertex,
+        h is at most |b - vertex| plus the height of the vertex above that line. Edges at a distance d from the vertex
+        can therefore not yield split points closer than (d - height * spread) / (1 + spread).
+        The edges are grouped by their spread rounded up to a power of 2, so that every group can be searched as far
+        as its own spread requires; edges with very flat bisectors are always checked instead.
+        """
+        self._unbounded_edges = []
+        groups = {}
+        if len(self._original_edges) < _MIN_INDEXED_EDGES:
+            # checking all edges of small polygons is faster than searching them
+            self._unbounded_edges = list(range(len(self._original_edges)))
+            self._edge_indices = []
+            return
+        for index, edge in enumerate(self._original_edges):
+            sine = min(abs(_cross(edge.edge.unit, edge.left_unit)), abs(_cross(edge.edge.unit, edge.right_unit)))
+            if sine < 2 ** -10:
+                self._unbounded_edges.append(index)
+                continue
+            p1 = edge.edge.p
+            p2 = edge.edge.p2
+            box = (min(p1.x, p2.x), min(p1.y, p2.y), max(p1.x, p2.x), max(p1.y, p2.y))
+            groups.setdefault(math.ceil(-math.log2(sine)), []).append((index, box))
+        self._edge_indices = []  # pairs of spread and grid
+        self._edge_cell_size = 0.
+        if groups:
+            self._edge_cell_size = sum(max(box[2] - box[0], box[3] - box[1]) for group in groups.values()
+                                       for _, box in group) / sum(len(group) for group in groups.values()) or 1.
+        for exponent, group in sorted(groups.items()):
+            grid = GridIndex(self._edge_cell_size)
+            for index, box in group:
+                grid.insert(index, box)
+            self._edge_indices.append((2. ** exponent, grid))
+
+    def edges_near(self, vertex):
+        """
+        Yields the indices of the original edges in batches of growing distance from a vertex, each together with the
+        smallest distance from the vertex at which a split event of any later edge can happen.
+        """
+        if not self._edge_indices:
+            yield self._unbounded_edges, float('inf')
+            return
+        yield self._unbounded_edges, 0.
+        point = vertex.point
+        # the height of the vertex above the lines of its edges, which is 0 for the vertices of the original polygon
+        height = max(_line_distance(*vertex.edge_left.line, point.x, point.y),
+                     _line_distance(*vertex.edge_right.line, point.x, point.y))
+        reach = self._edge_cell_size / 4
+        found = set()
+        remaining = sum(len(grid) for _, grid in self._edge_indices)
+        while remaining:
+            indices = []
+            for spread, grid in self._edge_indices:
+                radius = reach * (1 + spread) + height * spread
+                for index in grid.query((point.x - radius, point.y - radius, point.x + radius, point.y + radius)):
+                    if index not in found:
+                        found.add(index)
+                        indices.append(index)
+            remaining -= len(indices)
+            yield indices, reach
+            reach *= 2
+
+    def split_candidates(self, vertex, indices):
+        """
+        Yields the indices of those original edges that can yield a split event of a vertex, each together with the
+        intersection of its line with the line of the less parallel edge of the vertex.
+
+        The whole batch of edges is handled in one loop over plain floats that repeats the arithmetic of _intersect
+        and of _approximately_equals for points: edges of the vertex, parallel edges and edges whose line meets the
+        line of the edge of the vertex approximately in the vertex are left out. For large coordinates the latter are
+        nearly all edges, so only a few edges need the complete check in _LAVertex._split_event.
+        """
+        point_x = vertex.point.x
+        point_y = vertex.point.y
+        point_norm = math.sqrt(point_x ** 2 + point_y ** 2)
+        edge_left = vertex.edge_left
+        edge_right = vertex.edge_right
+        left_x, left_y = edge_left.unit
+        right_x, right_y = edge_right.unit
+        rows = self._edge_rows
+        for index in indices:
+            edge, edge_x, edge_y, ax, ay, avx, avy = rows[index]
+            if edge is edge_left or edge is edge_right:
+                continue
+            # we choose the "less parallel" edge (in order to exclude a potentially parallel edge)
+            if abs(left_x * edge_x + left_y * edge_y) < abs(right_x * edge_x + right_y * edge_y):
+                bx, by, bvx, bvy = edge_left.line
+            else:
+                bx, by, bvx, bvy = edge_right.line
+            # the intersection of the lines as in _intersect
+            d = bvy * avx - bvx * avy
+            if d == 0:
+                continue
+            ua = (bvx * (ay - by) - bvy * (ax - bx)) / d
+            x = ax + ua * avx
+            y = ay + ua * avy
+            # the test of _approximately_equals for two points
+            if (x == point_x and y == point_y) or \
+                    math.sqrt((x - point_x) ** 2 + (y - point_y) ** 2) <= max(math.sqrt(x ** 2 + y ** 2),
+                                                                              point_norm) * 0.001:
+                continue
+            yield index, (x, y)
 
     def __iter__(self):
         for lav in self._lavs:
@@ -262,6 +471,66 @@ class _SLAV:
 
         return Subtree(event.intersection_point, event.distance, sinks), events
 
+    def add_vertex(self, vertex):
+        self._left_vertices.setdefault(vertex.edge_left.key, {})[vertex] = None
+        self._right_vertices.setdefault(vertex.edge_right.key, {})[vertex] = None
+
+    def remove_vertex(self, vertex):
+        self._left_vertices[vertex.edge_left.key].pop(vertex, None)
+        self._right_vertices[vertex.edge_right.key].pop(vertex, None)
+
+    def drop_from_rings(self):
+        """
+        Notes that a relink has left vertices outside of every ring. They are still valid and registered, but the scan
+        of the lavs does not reach them, so the registry can't be used any longer.
+        """
+        self._rings_intact = False
+
+    def _find_opposite_vertices(self, event):
+        """
+        Finds the vertices x and y whose edge between them is a piece of the opposite edge of a split event and whose
+        bisectors enclose the intersection point.
+        Only the vertices that bound a piece of the opposite edge are checked; if several pairs enclose the point, the
+        first one in the order of the lavs is taken. Once vertices have been dropped from the rings, the lavs are
+        scanned instead.
+        """
+        if not self._rings_intact:
+            return self._scan_opposite_vertices(event)
+        key = event.opposite_edge.key
+        point = event.intersection_point
+        holders = {}
+        for v in self._left_vertices.get(key, ()):
+            if _encloses(v, v.prev, point):
+                holders[v] = (v, v.prev)
+        for v in self._right_vertices.get(key, ()):
+            if v.edge_left.key != key and _encloses(v.next, v, point):
+                holders[v] = (v.next, v)
+
+        pairs = set(holders.values())
+        if len(pairs) > 1:
+            for v in chain.from_iterable(self._lavs):
+               # log.debug("%s in %s", v, v.lav)
+                if v in holders:
+                    return holders[v]
+        return pairs.pop() if pairs else (None, None)
+
+    def _scan_opposite_vertices(self, event):
+        """
+        Finds the same vertices as _find_opposite_vertices by walking all vertices of all lavs.
+        """
+        key = event.opposite_edge.key
+        point = event.intersection_point
+        for v in chain.from_iterable(self._lavs):
+            if v.edge_left.key == key:
+                x, y = v, v.prev
+            elif v.edge_right.key == key:
+                x, y = v.next, v
+            else:
+                continue
+            if _encloses(x, y, point):
+                return x, y
+        return None, None
+
     def handle_split_event(self, event):
         lav = event.vertex.lav
        # log.info("%.2f Split event at intersection %s from vertex %s, for edge %s in %s", event.distance,
@@ -269,28 +538,7 @@ class _SLAV:
 
         sinks = [event.vertex.point]
         vertices = []
-        x = None  # right vertex
-        y = None  # left vertex
-        norm = event.opposite_edge.v.normalized()
-        for v in chain.from_iterable(self._lavs):
-           # log.debug("%s in %s", v, v.lav)
-            if norm == v.edge_left.v.normalized() and event.opposite_edge.p == v.edge_left.p:
-                x = v
-                y = x.prev
-            elif norm == v.edge_right.v.normalized() and event.opposite_edge.p == v.edge_right.p:
-                y = v
-                x = y.next
-
-            if x:
-                xleft = _cross(y.bisector.v.normalized(), (event.intersection_point - y.point).normalized()) >= 0
-                xright = _cross(x.bisector.v.normalized(), (event.intersection_point - x.point).normalized()) <= 0
-               # log.debug("Vertex %s holds edge as %s edge (%s, %s)", v, ("left" if x == v else "right"), xleft, xright)
-
-                if xleft and xright:
-                    break
-                else:
-                    x = None
-                    y = None
+        x, y = self._find_opposite_vertices(event)  # right and left vertex
 
         if x is None:
           #  log.info("Failed split event %s (equivalent edge event is expected to follow)", event)
@@ -314,9 +562,14 @@ class _SLAV:
         if lav != x.lav:
             # the split event actually merges two lavs
             self._lavs.remove(x.lav)
+            vertex_count = len(lav) + len(x.lav) + 1
             new_lavs = [_LAV.from_chain(v1, self)]
         else:
+            vertex_count = len(lav) + 1
             new_lavs = [_LAV.from_chain(v1, self), _LAV.from_chain(v2, self)]
+        # the event vertex is replaced by v1 and v2, any other vertex that is missing has been dropped from the rings
+        if sum(len(new_lav) for new_lav in new_lavs) != vertex_count:
+            self.drop_from_rings()
 
         for l in new_lavs:
            # log.debug(l)
@@ -339,6 +592,16 @@ class _SLAV:
         return Subtree(event.intersection_point, event.distance, sinks), events
 
 
+def _encloses(x, y, point):
+    # whether a point lies between the bisectors of the right vertex x and the left vertex y
+    xleft = _cross(_normalized(y._bisector_x, y._bisector_y),
+                   _normalized(point.x - y.point.x, point.y - y.point.y)) >= 0
+    xright = _cross(_normalized(x._bisector_x, x._bisector_y),
+                    _normalized(point.x - x.point.x, point.y - x.point.y)) <= 0
+   # log.debug("Vertex %s holds edge (%s, %s)", v, xleft, xright)
+    return xleft and xright
+
+
 class _LAV:
     def __init__(self, slav):
         self.head = None
@@ -351,8 +614,9 @@ class _LAV:
         lav = cls(slav)
         for prev, point, next in _window(polygon):
             lav._len += 1
-            vertex = _LAVertex(point, LineSegment2(prev, point), LineSegment2(point, next))
+            vertex = _LAVertex(point, _Edge(prev, point), _Edge(point, next))
             vertex.lav = lav
+            slav.add_vertex(vertex)
             if lav.head is None:
                 lav.head = vertex
                 vertex.prev = vertex.next = vertex
@@ -370,6 +634,7 @@ class _LAV:
         for vertex in lav:
             lav._len += 1
             vertex.lav = lav
+            slav.add_vertex(vertex)
         return lav
 
     def invalidate(self, vertex):
@@ -379,11 +644,17 @@ class _LAV:
         if self.head == vertex:
             self.head = self.head.next
         vertex.lav = None
+        self._slav.remove_vertex(vertex)
 
     def unify(self, vertex_a, vertex_b, point):
         replacement = _LAVertex(point, vertex_a.edge_left, vertex_b.edge_right,
-                                (vertex_b.bisector.v.normalized(), vertex_a.bisector.v.normalized()))
+                                (_normalized(vertex_b._bisector_x, vertex_b._bisector_y),
+                                 _normalized(vertex_a._bisector_x, vertex_a._bisector_y)))
         replacement.lav = self
+        self._slav.add_vertex(replacement)
+        if vertex_a.next is not vertex_b:
+            # the vertices between vertex_a and vertex_b are dropped from the ring
+            self._slav.drop_from_rings()
 
         if self.head in [vertex_a, vertex_b]:
             self.head = replacement
@@ -3,7 +3,9 @@ from typing import Union
 
 import core.polyskel2 as polyskel
 from core.geometry import *
+from core.grid_index import GridIndex, boxes_overlap
 from core.osm_helper import write_python_way
+from core.way_graph import WayGraph
 import core.tolerances as tolerances
 
 
@@ -30,17 +32,19 @@ class Room:
         The representations of doors as points.
     ways : list[dict[str, Union[list[tuple[float, float]], str]]]
         The calculated ways with their type and level information for later navigation.
-    decision_nodes : list[tuple[float, float]]
+    decision_nodes : set[tuple[float, float]]
         The points that connect more than 1 ways / 2 way segments.
     inner_barriers : list[list[tuple[float, float]]]
         The objects inside the room that represent obstacles like poles or bookcases.
 
     Methods
     -------
-    add_doors(all_doors: dict[str, list[tuple[float, float]]]) :
+    add_doors(all_doors: dict[str, list[tuple[float, float]]], door_index: dict[str, GridIndex]) :
         Finds and adds the doors that belong to the room.
     find_ways(self, simplify_ways: bool, door_to_door: bool) : list[dict[str, Union[list[tuple[float, float]], str]]]
         Calculates the ways for navigation inside the room.
+    estimated_cost() : float
+        Estimates the relative effort of find_ways for scheduling and progress output.
     """
 
     def __init__(self, polygon: list[tuple[float, float]], level: str,
@@ -50,7 +54,7 @@ class Room:
         self.level: str = level
         self.doors: list[tuple[float, float]] = []
         self.ways: list[dict[str, Union[list[tuple[float, float]], str]]] = []
-        self.decision_nodes = []
+        self.decision_nodes: set[tuple[float, float]] = set()
         self.barriers: list[list[tuple[float, float]]] = copy.deepcopy(inner_barriers) or []
         self._simplify()
         self._add_potential_barriers(potential_barriers or [])
@@ -104,18 +108,34 @@ class Room:
             if anti_clockwise(barrier):
                 barrier.reverse()
 
-    def add_doors(self, all_doors: dict[str, list[tuple[float, float]]]):
+    def add_doors(self, all_doors: dict[str, list[tuple[float, float]]], door_index: dict[str, GridIndex] = None):
         """
         Finds and adds the doors that belong to the room.
+        If a door index per level is given, only the doors near the room's edges are checked.
         """
         if self.level in all_doors:
+            level_index = door_index.get(self.level) if door_index is not None else None
             # check the outer polygon of the room
-            self.doors += add_doors_to_polygon(self.polygon, all_doors[self.level])
+            self.doors += add_doors_to_polygon(self.polygon, all_doors[self.level], level_index)
             for barrier in self.barriers:
                 # check for inner rooms
-                doors = add_doors_to_polygon(barrier, all_doors[self.level])
+                doors = add_doors_to_polygon(barrier, all_doors[self.level], level_index)
                 self.doors += doors
 
+    def estimated_cost(self) -> float:
+        """
+        Estimates the relative effort of find_ways from the vertex, barrier, reflex vertex and door counts.
+
+        Every reflex vertex causes a split event that is checked against all edges of the skeleton, the generated ways
+        grow with the number of vertices and doors and are compared pairwise in the post-processing.
+        """
+        vertices = len(self.polygon) + sum(len(barrier) for barrier in self.barriers)
+        # convex corners of the clockwise barriers are reflex vertices of the room
+        reflex = reflex_vertices(self.polygon) + sum(len(barrier) - reflex_vertices(barrier)
+                                                     for barrier in self.barriers)
+        ways = vertices + len(self.barriers) + len(self.doors)
+        return (vertices + reflex) * vertices + ways * ways
+
     def find_ways(self, simplify_ways_much: bool, door_to_door: bool) \
             -> list[dict[str, Union[list[tuple[float, float]], str]]]:
         """
@@ -147,77 +167,25 @@ class Room:
     def _enlarge_ways(self):
         """
         A helper method that combines several short ways to fewer long ways.
+        The ways are walked from decision node to decision node (or dead end); cycles without any become single ways.
         """
+        self._remove_duplicate_ways()
         self._find_decision_nodes()
-        processed_ways = []
-        new_ways = []
-        i = 0
-        while i < len(self.ways):
-            new_way = []
-            change = False
-            while i < len(self.ways):
-                if self.ways[i]['way'] in processed_ways:
-                    i += 1
-                else:
-                    new_way += self.ways[i]['way']
-                    processed_ways.append(self.ways[i]['way'])
-                    change = True
-                    i += 1
-                    break
-
-            while change:
-                change = False
-                for way in self.ways:
-                    if way['way'] not in processed_ways:
-
-                        if way['way'][0] == new_way[0]:
-                            if new_way[0] not in self.decision_nodes:
-                                way['way'].reverse()
-                                processed_ways.append(way['way'])
-                                new_way = way['way'][:-1] + new_way
-                                change = True
-
-                        elif way['way'][-1] == new_way[0]:
-                            if new_way[0] not in self.decision_nodes:
-                                processed_ways.append(way['way'])
-                                new_way = way['way'][:-1] + new_way
-                                change = True
-
-                        elif way['way'][0] == new_way[-1]:
-                            if new_way[-1] not in self.decision_nodes:
-                                processed_ways.append(way['way'])
-                                new_way += way['way'][1:]
-                                change = True
-
-                        elif way['way'][-1] == new_way[-1]:
-                            if new_way[-1] not in self.decision_nodes:
-                                way['way'].reverse()
-                                new_way += way['way'][1:]
-                                processed_ways.append(way['way'])
-                                change = True
+        graph = WayGraph(way['way'] for way in self.ways)
+        self.ways = [write_python_way(chain, self.level) for chain in graph.chains(self.decision_nodes)]
 
-            if new_way:  # equals expression "if new_way != []:"
-                new_ways.append(write_python_way(new_way, self.level))
-
-        self.ways = new_ways
-
-    def _find_decision_nodes(self):
+    def _find_decision_nodes(self) -> dict[tuple[float, float], int]:
         """
         A helper method that parses the current ways and finds all nodes that are connected to different ways.
+        These are the doors and the nodes that occur more than twice in the ways; the occurrences are returned.
         """
-        self._remove_duplicate_ways()
-        self.decision_nodes = []
-        self.decision_nodes.extend(self.doors)
-        for way in self.ways:
-            for node in way['way']:
-                if node not in self.decision_nodes:
-                    count = 0
-                    for way2 in self.ways:
-                        for node2 in way2['way']:
-                            if node == node2:
-                                count += 1
-                    if count > 2:
-                        self.decision_nodes.append(node)
+        occurrences: dict[tuple[float, float], int] = {}
+        for way_dict in self.ways:
+            for node in way_dict['way']:
+                occurrences[node] = occurrences.get(node, 0) + 1
+        self.decision_nodes = set(self.doors)
+        self.decision_nodes.update(node for node, count in occurrences.items() if count > 2)
+        return occurrences
 
     def _simplify_ways(self, simplify_much: bool):
         """
@@ -267,64 +235,154 @@ class Room:
         """
         A helper method that searches all way pairs for intersections.
         If two ways intersect, four separate ways are created.
+
+        The way segments are registered in a grid, so every way is only compared with the ways that have segments
+        nearby, and segment pairs whose bounding boxes are apart are skipped. The pairs are still processed in the
+        same order, so the intersection points are the same as with comparing all pairs.
         """
         self._remove_duplicate_ways()
+        grid, segments = self._segment_grid()
+        margin = tolerances.general_mapping_uncertainty
         i = 0
-        change = True
-        while change:
-            change = False
-            while i < len(self.ways) - 1:
-                j = i + 1
-                while j < len(self.ways):
-                    node_index_way1 = 0
-                    while node_index_way1 < len(self.ways[i]['way']) - 1:
-                        way1_point1 = self.ways[i]['way'][node_index_way1]
-                        way1_point2 = self.ways[i]['way'][node_index_way1 + 1]
-                        m_way1, b_way1 = get_line(way1_point1, way1_point2)
-                        node_index_way2 = 0
-                        while node_index_way2 < len(self.ways[j]['way']) - 1:
-                            way2_point1 = self.ways[j]['way'][node_index_way2]
-                            way2_point2 = self.ways[j]['way'][node_index_way2 + 1]
-                            m_way2, b_way2 = get_line(way2_point1, way2_point2)
-                            intersection_point = intersection(m_way1, m_way2, b_way1, b_way2)
-                            if intersection_point is not None \
-                                    and in_interval(way1_point1, way1_point2, intersection_point) \
-                                    and in_interval(way2_point1, way2_point2, intersection_point):
-                                self.ways.append(write_python_way(
-                                        [intersection_point] + self.ways[i]['way'][node_index_way1 + 1:], self.level))
-                                self.ways.append(write_python_way(
-                                        [intersection_point] + self.ways[j]['way'][node_index_way2 + 1:], self.level))
-                                self.ways[i]['way'] = self.ways[i]['way'][:node_index_way1 + 1] + [intersection_point]
-                                self.ways[j]['way'] = self.ways[j]['way'][:node_index_way2 + 1] + [intersection_point]
-                                way1_point2 = intersection_point
-                                m_way1, b_way1 = get_line(way1_point1, way1_point2)
+        while i < len(self.ways) - 1:
+            candidates = self._ways_near(i, grid, segments)
+            k = 0
+            while k < len(candidates):
+                j = candidates[k]
+                node_index_way1 = 0
+                while node_index_way1 < len(self.ways[i]['way']) - 1:
+                    way1_point1 = self.ways[i]['way'][node_index_way1]
+                    way1_point2 = self.ways[i]['way'][node_index_way1 + 1]
+                    m_way1, b_way1 = get_line(way1_point1, way1_point2)
+                    node_index_way2 = 0
+                    while node_index_way2 < len(self.ways[j]['way']) - 1:
+                        way2_point1 = self.ways[j]['way'][node_index_way2]
+                        way2_point2 = self.ways[j]['way'][node_index_way2 + 1]
+                        if not boxes_overlap(bounding_box([way1_point1, way1_point2], margin),
+                                             bounding_box([way2_point1, way2_point2], margin)):
                             node_index_way2 += 1
-                        node_index_way1 += 1
-                        change = True
-                    j += 1
-                i += 1
+                            continue
+                        m_way2, b_way2 = get_line(way2_point1, way2_point2)
+                        intersection_point = intersection(m_way1, m_way2, b_way1, b_way2)
+                        if intersection_point is not None \
+                                and in_interval(way1_point1, way1_point2, intersection_point) \
+                                and in_interval(way2_point1, way2_point2, intersection_point):
+                            self.ways.append(write_python_way(
+                                    [intersection_point] + self.ways[i]['way'][node_index_way1 + 1:], self.level))
+                            self.ways.append(write_python_way(
+                                    [intersection_point] + self.ways[j]['way'][node_index_way2 + 1:], self.level))
+                            self.ways[i]['way'] = self.ways[i]['way'][:node_index_way1 + 1] + [intersection_point]
+                            self.ways[j]['way'] = self.ways[j]['way'][:node_index_way2 + 1] + [intersection_point]
+                            way1_point2 = intersection_point
+                            m_way1, b_way1 = get_line(way1_point1, way1_point2)
+                            # the new ways come after all others and must be compared with the current way as well
+                            for new_index in (len(self.ways) - 2, len(self.ways) - 1):
+                                self._add_to_segment_grid(new_index, grid, segments)
+                                candidates.append(new_index)
+                        node_index_way2 += 1
+                    node_index_way1 += 1
+                k += 1
+            i += 1
+
+    def _segment_grid(self) -> tuple[GridIndex, list[tuple[int, int]]]:
+        """
+        A helper method that registers the segments of all ways in a grid whose cells are as large as an average
+        segment. The items of the grid are segment numbers; the returned list maps them to their way index and the
+        index of their first point.
+        """
+        extents = [max(abs(way['way'][n + 1][0] - way['way'][n][0]), abs(way['way'][n + 1][1] - way['way'][n][1]))
+                   for way in self.ways for n in range(len(way['way']) - 1)]
+        cell_size = sum(extents) / len(extents) if extents else 0.
+        grid = GridIndex(cell_size or 1.)
+        segments = []
+        for index in range(len(self.ways)):
+            self._add_to_segment_grid(index, grid, segments)
+        return grid, segments
+
+    def _add_to_segment_grid(self, index: int, grid: GridIndex, segments: list[tuple[int, int]]):
+        """
+        A helper method that registers the segments of a way in the segment grid.
+        """
+        way = self.ways[index]['way']
+        for n in range(len(way) - 1):
+            grid.insert(len(segments), bounding_box(way[n:n + 2], tolerances.general_mapping_uncertainty))
+            segments.append((index, n))
+
+    def _ways_near(self, index: int, grid: GridIndex, segments: list[tuple[int, int]]) -> list[int]:
+        """
+        A helper method that returns the indices of the later ways that have segments near the segments of a way.
+        """
+        way = self.ways[index]['way']
+        nearby = set()
+        for n in range(len(way) - 1):
+            box = bounding_box(way[n:n + 2], tolerances.general_mapping_uncertainty)
+            nearby.update(segments[segment][0] for segment in grid.query(box))
+        return sorted(other for other in nearby if other > index)
 
     def _remove_useless_ways(self):
         """
         A helper method that removes ways that aren't connected to doors or other ways.
+
+        A way is connected at a decision node. Every way is checked once and only the ways at the points of a removed
+        way are checked again, so no full rebuild is needed per removal; the decision nodes are kept up to date with the
+        occurrences of the points. Where a point is left with two occurrences at the ends of two ways, these are
+        joined. Ways with less than two points are dropped.
         """
-        self._find_decision_nodes()
-        change = True
-        while change:
-            i = 0
-            change = False
-            while i < len(self.ways):
-                if self.ways[i]['way'][0] not in self.decision_nodes \
-                        and self.ways[i]['way'][-1] not in self.decision_nodes:
-                    if self.ways[i]['way'][0] not in self.doors and self.ways[i]['way'][-1] not in self.doors:
-                        del self.ways[i]
-                        change = True
-                    else:
-                        i += 1
-                else:
-                    i += 1
-                if change:
-                    self._enlarge_ways()  # update
+        self._remove_duplicate_ways()
+        self.ways = [way_dict for way_dict in self.ways if len(way_dict['way']) > 1]
+        occurrences = self._find_decision_nodes()
+        doors = set(self.doors)
+        ways = [way_dict['way'] for way_dict in self.ways]
+        ends: dict[tuple[float, float], list[int]] = {}  # the indices of the ways that start or end in a point
+        for index, way in enumerate(ways):
+            ends.setdefault(way[0], []).append(index)
+            ends.setdefault(way[-1], []).append(index)
+
+        worklist = list(range(len(ways) - 1, -1, -1))  # popped from the end, so the ways are checked in their order
+        while worklist:
+            index = worklist.pop()
+            way = ways[index]
+            if way is None or way[0] in self.decision_nodes or way[-1] in self.decision_nodes:
+                continue
+            ways[index] = None
+            ends[way[0]].remove(index)
+            ends[way[-1]].remove(index)
+            for point in way:
+                occurrences[point] -= 1
+            for point in dict.fromkeys(way):
+                if point in doors or occurrences[point] > 2:
+                    continue
+                self.decision_nodes.discard(point)
+                # the ways ending at the point are checked again unless they were joined into one
+                if occurrences[point] != 2 or not self._join_ways(point, ways, ends, occurrences, worklist):
+                    worklist.extend(ends.get(point, ()))
+
+        self.ways = [write_python_way(way, self.level) for way in ways if way is not None]
+
+    @staticmethod
+    def _join_ways(point: tuple[float, float], ways: list[list[tuple[float, float]]],
+                   ends: dict[tuple[float, float], list[int]], occurrences: dict[tuple[float, float], int],
+                   worklist: list[int]) -> bool:
+        """
+        A helper method that joins the two ways ending in a point into the earlier of them and checks it again.
+        Returns False if the point isn't the end of two different ways, e.g. if a way passes through it.
+        """
+        if len(ends.get(point, ())) != 2 or ends[point][0] == ends[point][1]:
+            return False
+        first, second = sorted(ends[point])
+        way = ways[first]
+        other = ways[second] if ways[second][0] == point else ways[second][::-1]
+        if way[-1] == point:
+            ways[first] = way + other[1:]
+        else:
+            ways[first] = other[::-1] + way[1:]
+        ways[second] = None
+        ends[point] = []
+        occurrences[point] -= 1
+        far_end = ends[other[-1]]
+        far_end[far_end.index(second)] = first
+        worklist.append(first)
+        return True
 
     def _remove_duplicate_ways(self):
         """
@@ -332,18 +390,16 @@ class Room:
 
         Necessary because otherwise some nodes might be mistaken for decision nodes.
         """
-        i = 0
-        while i < len(self.ways):
-            if len(self.ways[i]['way']) == 2 and self.ways[i]['way'][0] == self.ways[i]['way'][1]:
-                del self.ways[i]
-            else:
-                j = i + 1
-                while j < len(self.ways):
-                    if self.ways[i] == self.ways[j]:
-                        del self.ways[j]
-                    else:
-                        j += 1
-                i += 1
+        known_ways = set()
+        unique_ways = []
+        for way in self.ways:
+            if len(way['way']) == 2 and way['way'][0] == way['way'][1]:
+                continue
+            key = (tuple(way['way']), way['level'], way['type'])
+            if key not in known_ways:
+                known_ways.add(key)
+                unique_ways.append(way)
+        self.ways = unique_ways
 
     def _add_supplementary_ways(self):
         """
@@ -356,67 +412,103 @@ class Room:
         e.g. some generated ways are not connected to a door or the doors are not connected at all.
         """
         new_ways = []
-        excluded = []
+        excluded = set()
         all_relevant_nodes = []
         all_relevant_nodes.extend(self.doors)
+        known_nodes = set(all_relevant_nodes)
 
         for way in self.ways:
             first_node = way['way'][0]
             last_node = way['way'][-1]
             if (first_node, last_node) not in excluded:
-                excluded.append((first_node, last_node))
-                excluded.append((last_node, first_node))
-                if first_node not in all_relevant_nodes:
-                    all_relevant_nodes.append(first_node)
-                if last_node not in all_relevant_nodes:
-                    all_relevant_nodes.append(last_node)
-
+                excluded.add((first_node, last_node))
+                excluded.add((last_node, first_node))
+                for node in (first_node, last_node):
+                    if node not in known_nodes:
+                        known_nodes.add(node)
+                        all_relevant_nodes.append(node)
+
+        edge_grid, edges = self._edge_grid()
+        way_grid, way_segments = self._segment_grid()
         for i in range(len(all_relevant_nodes) - 1):
             first_node = all_relevant_nodes[i]
             for j in range(i + 1, len(all_relevant_nodes)):
                 last_node = all_relevant_nodes[j]
                 if (first_node, last_node) not in excluded:
-                    if way_inside_room([first_node, last_node], self.polygon, self.barriers) and \
-                            not way_intersects_with_way([first_node, last_node], self.ways):
+                    if self._is_visible(first_node, last_node, edge_grid, edges, way_grid, way_segments):
                         new_ways.append(write_python_way([first_node, last_node], self.level))
 
         self.ways.extend(new_ways)
         self._split_intersecting_ways()
 
+    def _edge_grid(self) -> tuple[GridIndex, list[tuple[tuple[float, float], tuple[float, float]]]]:
+        """
+        A helper method that registers the edges of the room polygon and its barriers in a grid whose cells are as large
+        as an average edge. The items of the grid are the indices of the returned edges.
+        """
+        edges = [(polygon[n - 1], polygon[n]) for polygon in [self.polygon] + self.barriers
+                 for n in range(len(polygon))]
+        extents = [max(abs(edge[1][0] - edge[0][0]), abs(edge[1][1] - edge[0][1])) for edge in edges]
+        cell_size = sum(extents) / len(extents) if extents else 0.
+        grid = GridIndex(cell_size or 1.)
+        for n, edge in enumerate(edges):
+            grid.insert(n, bounding_box(list(edge), tolerances.general_mapping_uncertainty))
+        return grid, edges
+
+    def _is_visible(self, point1: tuple[float, float], point2: tuple[float, float],
+                    edge_grid: GridIndex, edges: list[tuple[tuple[float, float], tuple[float, float]]],
+                    way_grid: GridIndex, way_segments: list[tuple[int, int]]) -> bool:
+        """
+        A helper method that checks whether a direct way between two points is inside the room and crosses neither a
+        room or barrier edge nor a current way; equals way_inside_room and not way_intersects_with_way.
+        Only the edges and way segments near the way are tested, the expensive point in room test comes last.
+        """
+        box = bounding_box([point1, point2], tolerances.general_mapping_uncertainty)
+        for n in edge_grid.query(box):
+            if way_crosses_edge((point1, point2), edges[n]):
+                return False
+        for way_index, n in (way_segments[segment] for segment in way_grid.query(box)):
+            way = self.ways[way_index]['way']
+            if segments_intersect((point1, point2), (way[n], way[n + 1])):
+                return False
+        return point_inside_room(centroid([point1, point2]), self.polygon, self.barriers)
+
     def _reduce_clusters(self):
         """
         A helper method that finds point clusters and reduces them into a single point.
         """
         # find all points
-        unassigned_points: list[tuple[float, float]] = []
-        for way_dict in self.ways:
-            way = way_dict['way']
-            for point in way:
-                if point not in unassigned_points:
-                    unassigned_points.append(point)
+        unassigned_points: list[tuple[float, float]] = list(dict.fromkeys(point for way_dict in self.ways
+                                                                           for point in way_dict['way']))
 
-        # find the clusters with their points
+        # find the clusters with their points; the grid only holds the points that are not assigned to a cluster yet
+        point_grid = GridIndex(tolerances.point_to_point or 1.)
+        for index, point in enumerate(unassigned_points):
+            point_grid.insert(index, point + point)
         clusters: list[list[tuple[float, float]]] = []  # a list of point lists
-        while unassigned_points:
-            current_point = unassigned_points.pop(0)
+        for index, current_point in enumerate(unassigned_points):
+            if index not in point_grid:
+                continue
+            point_grid.remove(index)
             # check if point has close points
-            cluster = self._get_cluster_points(current_point, unassigned_points)
+            cluster = self._get_cluster_points(current_point, unassigned_points, point_grid)
             # if yes, add to a new clusters entry and check close points for the same cluster entry
             if cluster:
                 cluster.append(current_point)
                 clusters.append(cluster)
 
-        # get the centroids of the corresponding cluster; the centroid of clusters[k] is centroids[k]
-        centroids: list[tuple[float, float]] = [centroid(cluster) for cluster in clusters]
+        # get the centroids of the corresponding cluster and assign them to the cluster points
+        centroids: dict[tuple[float, float], tuple[float, float]] = {}
+        for cluster in clusters:
+            cluster_centroid = centroid(cluster)
+            for point in cluster:
+                centroids[point] = cluster_centroid
 
         # overwrite cluster points in ways
         for way_dict in self.ways:
             way = way_dict['way']
             for p_idx in range(len(way)):
-                for c_idx in range(len(clusters)):
-                    if way[p_idx] in clusters[c_idx]:
-                        way[p_idx] = centroids[c_idx]
-                        break
+                way[p_idx] = centroids.get(way[p_idx], way[p_idx])
 
         # delete zero-length way parts
         for way_dict in self.ways:
@@ -433,23 +525,33 @@ class Room:
             if len(way_dict['way']) < 2:
                 del way_dict
 
-    def _get_cluster_points(self, current_point, unassigned_points) \
-            -> list[tuple[float, float]]:
+    @staticmethod
+    def _get_cluster_points(current_point: tuple[float, float], points: list[tuple[float, float]],
+                            point_grid: GridIndex) -> list[tuple[float, float]]:
         """
-        A helper method that finds a point cluster recursively.
+        A helper method that finds a point cluster.
+
+        The close points of a point are added to the cluster in the order of the points, followed by the clusters of
+        each of them in turn; a stack replaces the recursion, and the grid only offers the unassigned points of
+        neighbouring cells.
         """
-        # init new cluster for current point
-        cluster = []
-        # check all points that belong to no cluster yet
-        i = 0
-        while i < len(unassigned_points):
-            # add point to current cluster and remove them from list of searchable points
-            if almost_same_point(current_point, unassigned_points[i], tolerance=tolerances.point_to_point):
-                cluster.append(unassigned_points.pop(i))
-                i -= 1
-            i += 1
-        # repeat recursively with new found points and add result to current cluster
-        for point in cluster:
-            cluster.extend(self._get_cluster_points(point, unassigned_points))
-        # return found cluster with sub-clusters
+        def take_close_points(point: tuple[float, float]) -> list[tuple[float, float]]:
+            close_points = []
+            for i in point_grid.query(bounding_box([point], tolerances.point_to_point)):
+                # add point to current cluster and remove it from the searchable points
+                if almost_same_point(point, points[i], tolerance=tolerances.point_to_point):
+                    point_grid.remove(i)
+                    close_points.append(points[i])
+            return close_points
+
+        cluster = take_close_points(current_point)
+        stack = [iter(list(cluster))]
+        while stack:
+            point = next(stack[-1], None)
+            if point is None:
+                stack.pop()
+                continue
+            close_points = take_close_points(point)
+            cluster.extend(close_points)
+            stack.append(iter(close_points))
         return cluster
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import pickle
+from typing import Union
+
+import core.tolerances as tolerances
+from core.room import Room
+
+
+class RoomCache:
+    """
+    An on-disk cache for the calculated ways of single rooms.
+
+    Every entry is a file named after a hash of everything find_ways depends on: the room polygon (with its doors), the
+    barriers, the doors, the level, the flags and the tolerances. If the cache has grown larger than its maximum size,
+    evict deletes the least recently used entries.
+
+    Args
+    ----
+    directory : str
+        The directory (with absolute or relative path) in which the entries are stored.
+    max_size : int
+        The maximum size of all entries in bytes.
+
+    Methods
+    -------
+    key(room: Room, simplify_ways_much: bool, door_to_door: bool) : str
+        Creates the hash of a room whose doors are already added.
+    load(key: str) : Union[list[dict[str, Union[list[tuple[float, float]], str]]], None]
+        Returns the cached ways of a key or None if there are none.
+    store(key: str, ways: list[dict[str, Union[list[tuple[float, float]], str]]])
+        Saves the ways of a key.
+    evict()
+        Deletes the least recently used entries until the cache fits its maximum size.
+    """
+
+    version = 1
+    """ increase if changes to the way calculation make old entries invalid """
+
+    def __init__(self, directory: str, max_size: int = 100 * 1024 ** 2):
+        self.directory: str = directory
+        self.max_size: int = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(room: Room, simplify_ways_much: bool, door_to_door: bool) -> str:
+        """
+        Creates the hash of a room whose doors are already added.
+        """
+        tolerance_values = sorted((name, value) for name, value in vars(tolerances).items()
+                                  if isinstance(value, float))
+        data = (RoomCache.version, room.polygon, room.barriers, room.doors, room.level,
+                simplify_ways_much, door_to_door, tolerance_values)
+        return hashlib.sha256(repr(data).encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Union[list[dict[str, Union[list[tuple[float, float]], str]]], None]:
+        """
+        Returns the cached ways of a key or None if there are none.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                ways = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(path)  # mark as recently used
+        return ways
+
+    def store(self, key: str, ways: list[dict[str, Union[list[tuple[float, float]], str]]]):
+        """
+        Saves the ways of a key; old entries are only evicted by evict, e.g. once after a whole batch of rooms.
+        """
+        temp_path = self._path(key) + '.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump(ways, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._path(key))
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the cache fits its maximum size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            os.remove(path)
+            size -= entry_size
+
+    def _path(self, key: str) -> str:
+        """
+        A helper method that returns the file name of an entry.
+        """
+        return os.path.join(self.directory, key + '.pickle')
@@ -0,0 +1,203 @@
+import xml.etree.ElementTree as ET
+from typing import Union
+
+from core.connection import Connection
+from core.geometry import add_doors_to_polygon, area, centroid, point_inside_room
+from core.grid_index import GridIndex
+from core.osm_helper import write_python_way
+from core.osm_writer import OsmWriter
+from core.parser import Parser
+from core.room import Room
+from core.room_cache import RoomCache
+
+
+class Updater:
+    """
+    A class that updates a previously generated network after the input file was edited with an osmChange file.
+
+    Only the rooms and connections that differ between the previous and the edited input are calculated again; the
+    ways of all other rooms and connections are taken from the previous output file.
+
+    Args
+    ----
+    previous_input_file_name : str
+        The osm file that the previous output was generated from.
+    previous_output_file_name : str
+        The previously generated osm file with the ways for navigation.
+    change_file_name : str
+        The osmChange file with the edits of the previous input.
+    input_file_name : str
+        The name of the file in which the edited input is saved.
+
+    Attributes
+    ----------
+    previous : Parser
+        The parsed data of the previous input.
+    parser : Parser
+        The parsed data of the edited input; its ways are the updated network after find_ways.
+    previous_ways : list[dict[str, Union[list[tuple[float, float]], str]]]
+        The ways of the previous output file.
+
+    Methods
+    -------
+    find_ways(simplify_ways_much: bool, door_to_door: bool, workers: int)
+        Calculates the ways of the changed rooms and connections and patches the previous ways.
+    write_osm(file_name: str, beautify: bool)
+        Creates a new file with the given name in OSM format to save the updated ways.
+    """
+
+    def __init__(self, previous_input_file_name: str, previous_output_file_name: str, change_file_name: str,
+                 input_file_name: str):
+        apply_change(previous_input_file_name, change_file_name, input_file_name)
+        self.previous: Parser = Parser(previous_input_file_name)
+        self.parser: Parser = Parser(input_file_name)
+        self.previous_ways: list[dict[str, Union[list[tuple[float, float]], str]]] = \
+            read_ways(previous_output_file_name)
+
+    def find_ways(self, simplify_ways_much: bool, door_to_door: bool, workers: int = 1):
+        """
+        Calculates the ways of the changed rooms and connections and patches the previous ways.
+        The flags must be the same as the ones used for the previous output.
+        """
+        self.previous.assign_doors()
+        self.parser.assign_doors()
+
+        # rooms and connections are identified by everything their ways depend on
+        previous_rooms = {RoomCache.key(room, simplify_ways_much, door_to_door): room for room in self.previous.rooms}
+        room_keys = [RoomCache.key(room, simplify_ways_much, door_to_door) for room in self.parser.rooms]
+        changed_rooms = [room for room, key in zip(self.parser.rooms, room_keys) if key not in previous_rooms]
+        current_room_keys = set(room_keys)
+        removed_rooms = [room for key, room in previous_rooms.items() if key not in current_room_keys]
+
+        previous_connections = {_connection_key(connection, self.previous.doors, self.previous.door_index): connection
+                                for connection in self.previous.connections}
+        connection_keys = [_connection_key(connection, self.parser.doors, self.parser.door_index)
+                           for connection in self.parser.connections]
+        changed_connections = [connection for connection, key in zip(self.parser.connections, connection_keys)
+                               if key not in previous_connections]
+        current_connection_keys = set(connection_keys)
+        removed_connections = [connection for key, connection in previous_connections.items()
+                               if key not in current_connection_keys]
+
+        print("rooms to update:", len(removed_rooms), "removed,", len(changed_rooms), "added;",
+              "connections to update:", len(removed_connections), "removed,", len(changed_connections), "added")
+
+        ways = self._remove_room_ways(self.previous_ways, removed_rooms)
+        ways = self._remove_connection_ways(ways, removed_connections)
+
+        self.parser.rooms = changed_rooms
+        self.parser.connections = changed_connections
+        self.parser.find_ways(simplify_ways_much, door_to_door, workers)
+        self.parser.ways = ways + self.parser.ways
+
+    def write_osm(self, file_name: str, beautify: bool):
+        """
+        Creates a new file with the given name in OSM format to save the updated ways.
+        """
+        self.parser.write_osm(file_name, beautify)
+
+    def _remove_room_ways(self, ways: list[dict[str, Union[list[tuple[float, float]], str]]],
+                          removed_rooms: list[Room]) -> list[dict[str, Union[list[tuple[float, float]], str]]]:
+        """
+        A helper method that removes the ways that were calculated for the removed rooms.
+        A way belongs to the smallest previous room that contains it, so rooms inside other rooms keep their ways.
+        """
+        removed_levels = {room.level for room in removed_rooms}
+        kept_ways = []
+        for way in ways:
+            if way['type'] != 'footway' or way['level'] not in removed_levels:
+                kept_ways.append(way)
+                continue
+            point = _inner_point(way['way'])
+            owners = [room for room in self.previous.rooms if room.level == way['level']
+                      and point_inside_room(point, room.polygon, room.barriers)]
+            owner = min(owners, key=lambda room: area(room.polygon), default=None)
+            if owner is None or not any(owner is room for room in removed_rooms):
+                kept_ways.append(way)
+        return kept_ways
+
+    @staticmethod
+    def _remove_connection_ways(ways: list[dict[str, Union[list[tuple[float, float]], str]]],
+                                removed_connections: list[Connection]) \
+            -> list[dict[str, Union[list[tuple[float, float]], str]]]:
+        """
+        A helper method that removes the ways that were calculated for the removed connections.
+        Every way of a connection starts in the centre of one of its connectors.
+        """
+        centres = set()
+        for connection in removed_connections:
+            for connector in connection.members:
+                centres.add((connection.type, centroid(connector['connector'][:-1]), connector['level']))
+        return [way for way in ways
+                if (way['type'], way['way'][0], way['level'].split(';')[0]) not in centres]
+
+
+def apply_change(input_file_name: str, change_file_name: str, output_file_name: str):
+    """
+    Applies the create, modify and delete actions of an osmChange file to an osm file and saves the result.
+    """
+    root = ET.parse(input_file_name).getroot()
+    elements: list[Union[ET.Element, None]] = list(root)
+    positions = {(element.tag, element.get('id')): i for i, element in enumerate(elements)}
+
+    for action in ET.parse(change_file_name).getroot():
+        for element in action:
+            key = (element.tag, element.get('id'))
+            if action.tag == 'delete':
+                if key in positions:
+                    elements[positions.pop(key)] = None
+            elif key in positions:
+                elements[positions[key]] = element
+            else:
+                positions[key] = len(elements)
+                elements.append(element)
+
+    # keep the usual order of bounds, nodes, ways and relations for created elements
+    order = {'bounds': 0, 'node': 1, 'way': 2, 'relation': 3}
+    elements = sorted((element for element in elements if element is not None),
+                      key=lambda element: order.get(element.tag, len(order)))
+
+    with OsmWriter(output_file_name) as writer:
+        writer.start(root.attrib)
+        for element in elements:
+            writer.write_tree(element)
+
+
+def read_ways(file_name: str) -> list[dict[str, Union[list[tuple[float, float]], str]]]:
+    """
+    Reads the ways of a generated osm file with their type and level information.
+    """
+    nodes: dict[str, tuple[float, float]] = {}
+    ways = []
+    for _, element in ET.iterparse(file_name):
+        if element.tag == 'node':
+            nodes[element.get('id')] = (float(element.get('lat')), float(element.get('lon')))
+        elif element.tag == 'way':
+            tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+            points = [nodes[nd.get('ref')] for nd in element.iter('nd')]
+            ways.append(write_python_way(points, tags['level'], tags['highway']))
+            element.clear()
+    return ways
+
+
+def _inner_point(way: list[tuple[float, float]]) -> tuple[float, float]:
+    """
+    Returns the middle of the first way segment, which lies inside the room of the way.
+    """
+    if len(way) < 2:
+        return way[0]
+    return (way[0][0] + way[1][0]) / 2, (way[0][1] + way[1][1]) / 2
+
+
+def _connection_key(connection: Connection, all_doors: dict[str, list[tuple[float, float]]],
+                    door_index: dict[str, GridIndex]) -> str:
+    """
+    Creates a representation of everything the ways of a connection depend on: its type, its connectors and the doors
+    that belong to them.
+    """
+    data = [connection.type]
+    for connector in connection.members:
+        polygon = list(connector['connector'])
+        doors = add_doors_to_polygon(polygon, all_doors.get(connector['level'], []), door_index.get(connector['level']))
+        data.append((connector['connector'], connector['level'], doors))
+    return repr(data)
@@ -0,0 +1,92 @@
+from typing import Iterable
+
+
+class WayGraph:
+    """
+    An undirected graph of way segments whose nodes are the way points.
+
+    The points are hashed, so neighbours and degrees are found without scanning all ways. Segments that exist several
+    times (e.g. in a way and in its reversed copy) are counted with their multiplicity.
+
+    Args
+    ----
+    ways : Iterable[list[tuple[float, float]]]
+        The point lists whose consecutive points are connected.
+
+    Methods
+    -------
+    add_edge(point1: tuple[float, float], point2: tuple[float, float])
+        Connects two points.
+    chains(stops: set[tuple[float, float]]) : list[list[tuple[float, float]]]
+        Splits the graph into maximal chains of segments that only pass points of degree 2.
+    """
+
+    def __init__(self, ways: Iterable[list[tuple[float, float]]] = ()):
+        self._adjacency: dict[tuple[float, float], dict[tuple[float, float], int]] = {}
+        self._degree: dict[tuple[float, float], int] = {}
+        self._segments: list[tuple[tuple[float, float], tuple[float, float]]] = []  # in the order they were added
+        for way in ways:
+            for i in range(len(way) - 1):
+                self.add_edge(way[i], way[i + 1])
+
+    def add_edge(self, point1: tuple[float, float], point2: tuple[float, float]):
+        """
+        Connects two points; a point is not connected to itself.
+        """
+        if point1 == point2:
+            return
+        self._segments.append((point1, point2))
+        for point, other in ((point1, point2), (point2, point1)):
+            neighbours = self._adjacency.setdefault(point, {})
+            neighbours[other] = neighbours.get(other, 0) + 1
+            self._degree[point] = self._degree.get(point, 0) + 1
+
+    def chains(self, stops: set[tuple[float, float]]) -> list[list[tuple[float, float]]]:
+        """
+        Splits the graph into maximal chains of segments that only pass points of degree 2 which are no stops.
+
+        Every segment is walked once. Chains are started at the unwalked segments in the order and direction they were
+        added and are extended at both ends; a cycle without stops becomes a single chain that ends at its first point.
+        """
+        used: dict[tuple[tuple[float, float], tuple[float, float]], int] = {}
+        chains = []
+        for point, neighbour in self._segments:
+            if self._free(point, neighbour, used):
+                self._use(point, neighbour, used)
+                forward = self._walk(neighbour, stops, used)
+                backward = self._walk(point, stops, used)
+                chains.append(backward[::-1] + [point, neighbour] + forward)
+        return chains
+
+    def _walk(self, point: tuple[float, float], stops: set[tuple[float, float]],
+              used: dict[tuple[tuple[float, float], tuple[float, float]], int]) -> list[tuple[float, float]]:
+        """
+        A helper method that follows unused segments from a point as long as the reached points can be passed.
+        """
+        points = []
+        while point not in stops and self._degree[point] == 2:
+            following = next((neighbour for neighbour in self._adjacency[point]
+                              if self._free(point, neighbour, used)), None)
+            if following is None:
+                break
+            self._use(point, following, used)
+            points.append(following)
+            point = following
+        return points
+
+    def _free(self, point1: tuple[float, float], point2: tuple[float, float],
+              used: dict[tuple[tuple[float, float], tuple[float, float]], int]) -> bool:
+        """
+        A helper method that checks whether a connection between two points has not been walked as often as it exists.
+        """
+        key = (point1, point2) if point1 < point2 else (point2, point1)
+        return used.get(key, 0) < self._adjacency.get(point1, {}).get(point2, 0)
+
+    @staticmethod
+    def _use(point1: tuple[float, float], point2: tuple[float, float],
+             used: dict[tuple[tuple[float, float], tuple[float, float]], int]):
+        """
+        A helper method that marks one connection between two points as walked.
+        """
+        key = (point1, point2) if point1 < point2 else (point2, point1)
+        used[key] = used.get(key, 0) + 1
@@ -1,6 +1,7 @@
 import sys
 
 from core.parser import Parser
+from core.room_cache import RoomCache
 
 
 if __name__ == '__main__':
@@ -16,6 +17,8 @@ if __name__ == '__main__':
     beautify_xml = '-2l' not in sys.argv
     door_to_door = '-dd' in sys.argv
     simplify_ways = '-sw' in sys.argv
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 1
+    cache = RoomCache(sys.argv[sys.argv.index('--cache') + 1]) if '--cache' in sys.argv else None
     remove_dead_ends = False
 
     # parsing
@@ -25,7 +28,7 @@ if __name__ == '__main__':
 
     # building
     print("##### Calculating routes ...")
-    parser.find_ways(simplify_ways, door_to_door)
+    parser.find_ways(simplify_ways, door_to_door, workers, cache)
     print()  # print("completed.\n")
 
     # saving
@@ -0,0 +1,39 @@
+import sys
+
+from core.updater import Updater
+
+
+if __name__ == '__main__':
+    print()
+
+    # check for correct input
+    if len(sys.argv) < 4:
+        raise AttributeError("You need to specify the previous input file, the previous output file and a change file!")
+
+    # settings and file names
+    previous_input_file_name = sys.argv[1]
+    previous_output_file_name = sys.argv[2]
+    change_file_name = sys.argv[3]
+    input_file_name = previous_input_file_name[:-4] + '__updated' + previous_input_file_name[-4:]
+    output_file_name = input_file_name[:-4] + '__routes' + input_file_name[-4:]
+    beautify_xml = '-2l' not in sys.argv
+    door_to_door = '-dd' in sys.argv
+    simplify_ways = '-sw' in sys.argv
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 1
+
+    # parsing
+    print("##### Applying changes and parsing file data ...", end=' ', flush=True)
+    updater = Updater(previous_input_file_name, previous_output_file_name, change_file_name, input_file_name)
+    print("completed.\n")
+
+    # building
+    print("##### Calculating changed routes ...")
+    updater.find_ways(simplify_ways, door_to_door, workers)
+    print()
+
+    # saving
+    print("##### Writing data to new file ...", end=' ', flush=True)
+    updater.write_osm(output_file_name, beautify_xml)
+    print("completed.\n")
+
+    print("--- finished successful ---\n")
@@ -1,9 +1,12 @@
 import math
 import sys
 import xml.etree.ElementTree as ET
+from itertools import chain
 
-from core.geometry import almost_same_point, centroid
-from core.osm_helper import beautify_xml
+from core.geometry import almost_same_point, bounding_box, centroid
+from core.grid_index import GridIndex
+from core.node_store import NodeStore
+from core.osm_writer import OsmWriter
 
 
 def coords(node: ET.Element) -> tuple[float, float]:
@@ -43,9 +46,13 @@ class Merger:
         self.output_file_name = input_file_name[:-4] + '__merged' + input_file_name[-4:]
         self.root = ET.parse(input_file_name).getroot()
         self._parse()
+        self.node_store = NodeStore()
+        self._node_elements: list[ET.Element] = []
+        self._fill_node_store()
         self.level_elements: dict[str, dict[str, list[ET.Element]]] = {}
         self._fill_level_elements(self.nodes, 'nodes')
         self._fill_level_elements(self.ways, 'ways')
+        self._node_refs: dict[str, list[ET.Element]] = {}
 
     def _parse(self):
         """
@@ -56,6 +63,26 @@ class Merger:
         self.ways = self.root.findall('way')
         self.relations = self.root.findall('relation')
 
+    def _fill_node_store(self):
+        """
+        A helper method that stores the coordinates of all nodes; the elements are kept in the order of their index.
+        """
+        for node in self.nodes:
+            self.node_store.add(node.get('id'), *coords(node))
+            self._node_elements.append(node)
+
+    def _node(self, node_id: str) -> ET.Element:
+        """
+        A helper method that returns the node element with the given id.
+        """
+        return self._node_elements[self.node_store.index(node_id)]
+
+    def _coords(self, node: ET.Element) -> tuple[float, float]:
+        """
+        A helper method that returns the stored latitude and longitude of a node element.
+        """
+        return self.node_store.coordinates(self.node_store.index(node.get('id')))
+
     def _fill_level_elements(self, elements: list[ET.Element], name: str):
         """
         Collects all parsed elements with a level tag.
@@ -78,8 +105,8 @@ class Merger:
         for way in self.ways:
             # collect information
             node_refs = way.findall('nd')
-            nodes = [self.root.find("./node[@id='" + node_ref.get('ref') + "']") for node_ref in node_refs]
-            node_coords = [coords(node) for node in nodes]
+            nodes = [self._node(node_ref.get('ref')) for node_ref in node_refs]
+            node_coords = [self._coords(node) for node in nodes]
             # check for double points
             for i in range(len(nodes) - 1, 0, -1):
                 if node_coords[i-1] == node_coords[i]:
@@ -113,12 +140,10 @@ class Merger:
         Deletes all nodes without information and reference.
         """
         # collect all nodes with tags or reference
-        important_nodes = [node for node in self.nodes if node.find("tag") is not None]
+        important_nodes = {node for node in self.nodes if node.find("tag") is not None}
         for way in self.ways:
             for node_ref in way.findall('nd'):
-                node = self.root.find("./node[@id='" + node_ref.get('ref') + "']")
-                if node not in important_nodes:
-                    important_nodes.append(node)
+                important_nodes.add(self._node(node_ref.get('ref')))
         # delete all other nodes
         for node in self.nodes:
             if node not in important_nodes:
@@ -128,10 +153,11 @@ class Merger:
         """
         Finds point clusters in every level and merges them into a single point.
         """
+        self._node_refs = self._find_node_refs()
         for level in self.level_elements:
             # find all points that belong to the level
             level_nodes = self._find_all_level_points(level)
-            level_points = [coords(node) for node in level_nodes]
+            level_points = [self._coords(node) for node in level_nodes]
 
             # find the clusters with their points
             clusters = self._find_clusters(level_points, tolerance)
@@ -140,8 +166,8 @@ class Merger:
             centroids: list[tuple[float, float]] = [rounded(centroid(cluster)) for cluster in clusters]
 
             # check clusters for important points and set them as cluster center
-            important_level_points = [coords(node) for node in level_nodes
-                                      if node.find("tag[@k='level']") is not None]
+            important_level_points = {self._coords(node) for node in level_nodes
+                                      if node.find("tag[@k='level']") is not None}
             for cluster_idx in range(len(clusters)):
                 for point in clusters[cluster_idx]:
                     if point in important_level_points:
@@ -149,47 +175,63 @@ class Merger:
                         break
 
             # overwrite cluster points in ways
-            for way in self.level_elements[level]['ways']:
+            cluster_indices: dict[tuple[float, float], int] = {}
+            for cluster_idx in range(len(clusters)):
+                for point in clusters[cluster_idx]:
+                    cluster_indices.setdefault(point, cluster_idx)
+            for way in self.level_elements[level].get('ways', []):
                 for node_ref in way.findall('nd'):
-                    node = self.root.find("./node[@id='" + node_ref.get('ref') + "']")
-                    for cluster_idx in range(len(clusters)):
-                        if coords(node) in clusters[cluster_idx]:
-                            node.attrib['lat'] = str(centroids[cluster_idx][0])
-                            node.attrib['lon'] = str(centroids[cluster_idx][1])
-                            break
+                    node = self._node(node_ref.get('ref'))
+                    cluster_idx = cluster_indices.get(self._coords(node))
+                    if cluster_idx is not None:
+                        node.attrib['lat'] = str(centroids[cluster_idx][0])
+                        node.attrib['lon'] = str(centroids[cluster_idx][1])
+                        self.node_store.set_coordinates(self.node_store.index(node.get('id')),
+                                                        *centroids[cluster_idx])
 
             # merge nodes at same position by deleting nodes and re-reference way points
-            for node_idx in range(len(self.nodes)-1, 0, -1):
-                # leave out important nodes like doors
-                if self.nodes[node_idx].find("tag[@k='level']") is not None:
-                    continue
-                # don't look at point that were not in a cluster
-                if coords(self.nodes[node_idx]) not in centroids:
-                    continue
-                # delete node and ref if its on an important position (like under a door) and therefore useless
-                # !!! this causes problems if a door is on an edge (e.g. below stairs)
-                # if coords(self.nodes[node_idx]) in important_level_points:
-                    # self._del_ref(self.nodes[node_idx].get('id'))
-                    # del self.nodes[node_idx]
-                    # continue
-                # otherwise search for other points with same position and re-reference the id
-                for other_idx in range(node_idx):
-                    if coords(self.nodes[node_idx]) == coords(self.nodes[other_idx]):
-                        self._re_ref(self.nodes[node_idx].get('id'), self.nodes[other_idx].get('id'))
-                        del self.nodes[node_idx]
-                        break
+            self._merge_same_positions(set(centroids))
+
+    def _merge_same_positions(self, positions: set[tuple[float, float]]):
+        """
+        A helper method that deletes the nodes at the given positions which have the same position as a previous node
+        and re-references their way points to the first node at this position.
+        """
+        first_nodes: dict[tuple[float, float], ET.Element] = {}
+        for node in self.nodes:
+            first_nodes.setdefault(self._coords(node), node)
+        kept_nodes = []
+        for node in self.nodes:
+            position = self._coords(node)
+            # leave out important nodes like doors and don't look at point that were not in a cluster
+            if node.find("tag[@k='level']") is not None or position not in positions:
+                kept_nodes.append(node)
+                continue
+            # delete node and ref if its on an important position (like under a door) and therefore useless
+            # !!! this causes problems if a door is on an edge (e.g. below stairs)
+            # if position in important_level_points:
+                # self._del_ref(node.get('id'))
+                # continue
+            # otherwise re-reference the id to the first node with same position
+            if first_nodes[position] is node:
+                kept_nodes.append(node)
+            else:
+                self._re_ref(node.get('id'), first_nodes[position].get('id'))
+        self.nodes[:] = kept_nodes
 
     def _find_all_level_points(self, level: str) -> list[ET.Element]:
         """
         Collects the points that belong to the elements of the given level.
         """
         points = []
-        for node in self.level_elements[level]['nodes']:
+        for node in self.level_elements[level].get('nodes', []):
             points.append(node)
-        for way in self.level_elements[level]['ways']:
+        known_points = set(points)
+        for way in self.level_elements[level].get('ways', []):
             for node_ref in way.findall("nd")[:-1]:
-                node = self.root.find("./node[@id='" + node_ref.get('ref') + "']")  # find referenced node
-                if node not in points:
+                node = self._node(node_ref.get('ref'))  # find referenced node
+                if node not in known_points:
+                    known_points.add(node)
                     points.append(node)
         return points
 
@@ -198,38 +240,64 @@ class Merger:
         """
         A helper method that finds all point clusters from a list of points.
         """
+        # a grid with the tolerance as cell size only offers the points of neighbouring cells
+        unassigned_points = GridIndex(tolerance or 1.)
+        for index, point in enumerate(level_points):
+            unassigned_points.insert(index, point + point)
         clusters: list[list[tuple[float, float]]] = []  # a list of point lists
-        while level_points:
-            current_point = level_points.pop(0)
+        for index, current_point in enumerate(level_points):
+            if index not in unassigned_points:
+                continue
+            unassigned_points.remove(index)
             # check if point has close points
-            cluster = self._get_cluster_points(current_point, level_points, tolerance)
+            cluster = self._get_cluster_points(current_point, level_points, unassigned_points, tolerance)
             # if yes, add to a new clusters entry and check close points for the same cluster entry
             if cluster:
                 cluster.append(current_point)
                 clusters.append(cluster)
         return clusters
 
-    def _get_cluster_points(self, current_point: tuple[float, float], unassigned_points: list[tuple[float, float]],
-                            tolerance: float) -> list:
+    @staticmethod
+    def _get_cluster_points(current_point: tuple[float, float], level_points: list[tuple[float, float]],
+                            unassigned_points: GridIndex, tolerance: float) -> list:
         """
-        A helper method that finds a point cluster from a single given point recursively.
+        A helper method that finds a point cluster from a single given point.
+        The close points of a point are added in their order, followed by the sub-clusters of each of them in turn.
         """
+        def take_close_points(point: tuple[float, float]) -> list[tuple[float, float]]:
+            close_points = []
+            for i in unassigned_points.query(bounding_box([point], tolerance)):
+                # add point to current cluster and remove them from the searchable points
+                if almost_same_point(point, level_points[i], tolerance):
+                    unassigned_points.remove(i)
+                    close_points.append(level_points[i])
+            return close_points
+
         # init new cluster for current point
-        cluster = []
-        # check all points that belong to no cluster yet
-        i = 0
-        while i < len(unassigned_points):
-            # add point to current cluster and remove them from list of searchable points
-            if almost_same_point(current_point, unassigned_points[i], tolerance):
-                cluster.append(unassigned_points.pop(i))
-                i -= 1
-            i += 1
-        # repeat recursively with new found points and add result to current cluster
-        for point in cluster:
-            cluster.extend(self._get_cluster_points(point, unassigned_points, tolerance))
+        cluster = take_close_points(current_point)
+        # repeat with new found points and add result to current cluster
+        stack = [iter(list(cluster))]
+        while stack:
+            point = next(stack[-1], None)
+            if point is None:
+                stack.pop()
+                continue
+            close_points = take_close_points(point)
+            cluster.extend(close_points)
+            stack.append(iter(close_points))
         # return found cluster with sub-clusters
         return cluster
 
+    def _find_node_refs(self) -> dict[str, list[ET.Element]]:
+        """
+        A helper method that collects the referencing nd elements of all ways for every node id.
+        """
+        node_refs: dict[str, list[ET.Element]] = {}
+        for way in self.ways:
+            for node_ref in way.findall('nd'):
+                node_refs.setdefault(node_ref.get('ref'), []).append(node_ref)
+        return node_refs
+
     def _del_ref(self, node_id: str):
         """
         A helper method to delete the referenced node out of self.ways.
@@ -243,34 +311,21 @@ class Merger:
         """
         A helper method to change the referenced node ids in self.ways.
         """
-        for way in self.ways:
-            for node_ref in way.findall('nd'):
-                if node_ref.get('ref') == orig_id:
-                    node_ref.set('ref', new_id)
+        node_refs = self._node_refs.pop(orig_id, [])
+        for node_ref in node_refs:
+            node_ref.set('ref', new_id)
+        self._node_refs.setdefault(new_id, []).extend(node_refs)
 
     def write_new_file(self):
         """
         Creates a new file with the merged points in OSM format.
         """
-        # create a root Element for the data
-        osm_root = ET.Element("osm", version='0.6', upload='false')
-
-        # add bounds, nodes, ways and relations
-        for bound in self.bounds:
-            osm_root.append(bound)
-        for node in self.nodes:
-            osm_root.append(node)
-        for way in self.ways:
-            osm_root.append(way)
-        for relation in self.relations:
-            osm_root.append(relation)
-
-        # finalize tree
-        tree = ET.ElementTree(osm_root)
-        tree.write(self.output_file_name, encoding='utf-8', xml_declaration=True)
+        with OsmWriter(self.output_file_name) as writer:
+            writer.start({'version': '0.6', 'upload': 'false'})
 
-        # polish up xml file
-        beautify_xml(self.output_file_name)
+            # add bounds, nodes, ways and relations
+            for element in chain(self.bounds, self.nodes, self.ways, self.relations):
+                writer.write_tree(element)
 
 
 if __name__ == '__main__':
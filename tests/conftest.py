@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts run from src, so the tests import the core package the same way
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,26 @@
+import math
+import random
+
+import core.polyskel2 as polyskel
+
+
+def _star(seed, n):
+    rng = random.Random(seed)
+    polygon = []
+    for i in range(n):
+        angle = 2 * math.pi * i / n
+        polygon.append((math.cos(angle) * rng.uniform(50, 100), math.sin(angle) * rng.uniform(50, 100)))
+    hole = [(-5, -5), (-5, 5), (5, 5), (5, -5)]
+    return polygon, [hole]
+
+
+def _arcs(skeleton):
+    return [(arc.source.x, arc.source.y, arc.height, [(sink.x, sink.y) for sink in arc.sinks]) for arc in skeleton]
+
+
+def test_split_events_ignore_vertices_dropped_from_their_ring(monkeypatch):
+    # an edge event of two vertices that are no longer neighbours drops the vertices between them from the ring
+    polygon, holes = _star(80, 70)
+    skeleton = _arcs(polyskel.skeletonize(polygon, holes))
+    monkeypatch.setattr(polyskel._SLAV, '_find_opposite_vertices', polyskel._SLAV._scan_opposite_vertices)
+    assert skeleton == _arcs(polyskel.skeletonize(polygon, holes))
@@ -0,0 +1,28 @@
+from core.osm_helper import write_python_way
+from core.room import Room
+
+
+def _pruned_ways(doors, ways):
+    room = Room([(-10., -10.), (10., -10.), (10., 10.), (-10., 10.)], '0')
+    room.doors = doors
+    room.ways = [write_python_way(way, '0') for way in ways]
+    room._remove_useless_ways()
+    return [way['way'] for way in room.ways]
+
+
+def test_spur_at_a_point_inside_a_way_is_removed():
+    assert _pruned_ways([(0, 0)], [[(0, 0), (1, 0), (2, 0)], [(1, 0), (1, 1)]]) == [[(0, 0), (1, 0), (2, 0)]]
+
+
+def test_way_is_checked_again_when_a_point_inside_another_way_drops_to_two_occurrences():
+    ways = [[(0, 0), (1, 0), (2, 0)], [(1, 0), (1, 1)], [(5, -1), (1, 0), (5, 1)]]
+    assert _pruned_ways([(0, 0)], ways) == [[(0, 0), (1, 0), (2, 0)]]
+
+
+def test_ways_are_joined_where_a_point_drops_to_two_occurrences():
+    ways = [[(0, 0), (1, 0)], [(1, 0), (2, 0)], [(5, -1), (1, 0), (5, 1)]]
+    assert _pruned_ways([(0, 0), (2, 0)], ways) == [[(0, 0), (1, 0), (2, 0)]]
+
+
+def test_ways_with_less_than_two_points_are_dropped():
+    assert _pruned_ways([(0, 0)], [[(0, 0), (1, 0)], [(1, 0)]]) == [[(0, 0), (1, 0)]]